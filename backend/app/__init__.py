@@ -0,0 +1,9 @@
+import time
+
+from dotenv import load_dotenv
+
+# Start of the cold start, reported per phase by app.main
+BOOT_STARTED = time.perf_counter()
+
+# Loaded once, before any module reads its configuration
+load_dotenv()
@@ -8,15 +8,45 @@ from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import AsyncSessionLocal
 from app.models import User
+from app.ttl_cache import TTLCache
+from app.password_pool import hashing_pool
+from app.metrics import CallbackMetric
 import os
+import time
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey") # CHANGE THIS IN PRODUCTION
 ALGORITHM = "HS256"
+# bcrypt cost factor for new hashes; existing hashes keep the cost they were made with
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 # ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 # 24 hours
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Verified principals keyed by token. An entry never outlives the token's own `exp`,
+# so the cache can only skip the user lookup, never extend a session.
+# Code that changes or deletes a user calls invalidate_user; changes this process cannot see
+# (another worker, direct SQL) reach cached tokens within TOKEN_CACHE_TTL seconds.
+token_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", "300"))
+)
+
+CallbackMetric(
+    "auth_token_cache_events_total", "Verified-token cache lookups and removals",
+    lambda: [({"event": e}, getattr(token_cache, e)) for e in ("hits", "misses", "evictions", "expirations")],
+    labels=("event",), kind="counter"
+)
+
+def invalidate_user(username: Optional[str] = None):
+    # Call whenever a user is changed or removed so cached tokens re-check the database; None clears all
+    if username is None:
+        token_cache.clear()
+        return
+    for token, user in token_cache.items():
+        if user.username == username:
+            token_cache.pop(token)
+
 def verify_password(plain_password, hashed_password):
     if not plain_password or not hashed_password:
         return False
@@ -31,9 +61,17 @@ def verify_password(plain_password, hashed_password):
 
 def get_password_hash(password):
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(pwd_bytes, salt).decode('utf-8')
 
+# Async variants for request handlers: run in the bounded hashing pool,
+# raise PoolSaturated when it is full
+async def verify_password_async(plain_password, hashed_password):
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await hashing_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -48,12 +86,13 @@ async def get_db():
     async with AsyncSessionLocal() as db:
         yield db
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    # Signature and expiry are verified on every request, cached or not
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -61,9 +100,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-        
-    result = await db.execute(select(User).where(User.username == username))
-    user = result.scalars().first()
+
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.username == username))
+        user = result.scalars().first()
     if user is None:
         raise credentials_exception
+
+    expires_in = payload.get("exp", 0) - time.time()
+    token_cache.set(token, user, ttl=expires_in)
     return user
@@ -0,0 +1,110 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import dialect_insert
+from app.models import ChatHourlyStats, ChatSessionHour, ChatTopicRollup
+
+
+def hour_bucket(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        # SQLite returns naive datetimes; everything is stored in UTC
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+async def fold_batch(db: AsyncSession, batch: List[dict]):
+    """
+    Add a batch of chat log rows to the hourly rollups.
+
+    Runs in its own transaction after the ChatLog insert has committed, so a
+    rollup failure never loses raw rows (see ChatLogWriter._flush). Counters
+    are incremented in SQL, which keeps concurrent writers (other workers)
+    from overwriting each other.
+    """
+    if not batch:
+        return
+    messages = Counter()
+    fallbacks = Counter()
+    topics = Counter()
+    session_hours = set()
+    for row in batch:
+        hour = hour_bucket(row["timestamp"])
+        messages[hour] += 1
+        if row.get("topic"):
+            topics[(hour, row["topic"])] += 1
+        else:
+            fallbacks[hour] += 1
+        session_hours.add((hour, row["session_id"]))
+
+    # Only sessions not seen before in that hour count towards `sessions`
+    result = await db.execute(
+        dialect_insert(ChatSessionHour)
+        .values([{"hour": hour, "session_id": session_id} for hour, session_id in session_hours])
+        .on_conflict_do_nothing()
+        .returning(ChatSessionHour.hour)
+    )
+    new_sessions = Counter(hour_bucket(hour) for hour in result.scalars().all())
+
+    stmt = dialect_insert(ChatHourlyStats).values([
+        {"hour": hour, "messages": count, "fallbacks": fallbacks[hour], "sessions": new_sessions[hour]}
+        for hour, count in messages.items()
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[ChatHourlyStats.hour],
+        set_={
+            "messages": ChatHourlyStats.messages + stmt.excluded.messages,
+            "fallbacks": ChatHourlyStats.fallbacks + stmt.excluded.fallbacks,
+            "sessions": ChatHourlyStats.sessions + stmt.excluded.sessions,
+        },
+    ))
+
+    if topics:
+        stmt = dialect_insert(ChatTopicRollup).values([
+            {"hour": hour, "topic": topic, "messages": count} for (hour, topic), count in topics.items()
+        ])
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[ChatTopicRollup.hour, ChatTopicRollup.topic],
+            set_={"messages": ChatTopicRollup.messages + stmt.excluded.messages},
+        ))
+
+
+async def chat_dashboard(db: AsyncSession, hours: int) -> dict:
+    # Reads at most `hours` stats rows and `hours * topics` rollup rows, whatever the log volume
+    since = hour_bucket(datetime.now(timezone.utc)) - timedelta(hours=hours - 1)
+
+    result = await db.execute(
+        select(ChatHourlyStats).where(ChatHourlyStats.hour >= since).order_by(ChatHourlyStats.hour)
+    )
+    hourly = [
+        {"hour": hour_bucket(row.hour), "messages": row.messages, "fallbacks": row.fallbacks, "sessions": row.sessions}
+        for row in result.scalars().all()
+    ]
+
+    result = await db.execute(
+        select(ChatTopicRollup.topic, func.sum(ChatTopicRollup.messages).label("messages"))
+        .where(ChatTopicRollup.hour >= since)
+        .group_by(ChatTopicRollup.topic)
+        .order_by(func.sum(ChatTopicRollup.messages).desc())
+    )
+    topics = [{"topic": topic, "messages": int(count)} for topic, count in result.all()]
+
+    total_messages = sum(h["messages"] for h in hourly)
+    total_fallbacks = sum(h["fallbacks"] for h in hourly)
+    return {
+        "since": since,
+        "hours": hours,
+        "totals": {
+            "messages": total_messages,
+            "fallbacks": total_fallbacks,
+            "fallback_rate": (total_fallbacks / total_messages) if total_messages else 0.0,
+            # A session active in several hours is counted once per hour
+            "session_hours": sum(h["sessions"] for h in hourly),
+        },
+        "hourly": hourly,
+        "topics": topics,
+    }
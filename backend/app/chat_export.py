@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.future import select
+
+from app.database import AsyncSessionLocal
+from app.models import ChatLog
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_COLUMNS = ("id", "session_id", "user_message", "bot_response", "topic", "timestamp")
+EXPORT_BATCH_SIZE = 2000
+
+
+def export_query(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 session_id: Optional[str] = None):
+    # Plain columns, not ORM entities, so nothing accumulates in an identity map
+    query = select(*(getattr(ChatLog, name) for name in EXPORT_COLUMNS))
+    if start:
+        query = query.where(ChatLog.timestamp >= start)
+    if end:
+        query = query.where(ChatLog.timestamp < end)
+    if session_id:
+        query = query.where(ChatLog.session_id == session_id)
+    return query.order_by(ChatLog.timestamp, ChatLog.id)
+
+
+def encode_batch(rows, fmt: str, header: bool = False) -> bytes:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps(dict(row), default=lambda v: v.isoformat(), ensure_ascii=False) + "\n" for row in rows
+        ).encode("utf-8")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(
+        [row[name].isoformat() if isinstance(row[name], datetime) else row[name] for name in EXPORT_COLUMNS]
+        for row in rows
+    )
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_chat_logs(fmt: str = "ndjson", compress: bool = False, start: Optional[datetime] = None,
+                           end: Optional[datetime] = None, session_id: Optional[str] = None,
+                           batch_size: int = EXPORT_BATCH_SIZE, query=None) -> AsyncIterator[bytes]:
+    """
+    Yield an export of chat logs as byte chunks, one per fetched batch.
+
+    Rows come through a server-side cursor `batch_size` at a time and each
+    batch is encoded (and optionally gzip-compressed) before the next one is
+    fetched, so memory stays flat regardless of the number of rows. The
+    generator owns its session so it can outlive the request's dependencies.
+    Pass `query` to export something other than the live table (archival).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {EXPORT_FORMATS}")
+    gzipper = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    if query is None:
+        query = export_query(start, end, session_id)
+    first = True
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.mappings().partitions():
+            chunk = encode_batch(rows, fmt, header=(first and fmt == "csv"))
+            first = False
+            if gzipper:
+                chunk = gzipper.compress(chunk)
+            if chunk:
+                yield chunk
+
+    if first and fmt == "csv":
+        chunk = encode_batch([], fmt, header=True)
+        yield gzipper.compress(chunk) if gzipper else chunk
+    if gzipper:
+        yield gzipper.flush()
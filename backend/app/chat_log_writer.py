@@ -0,0 +1,192 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import insert
+
+from app.chat_analytics import fold_batch
+from app.database import AsyncSessionLocal
+from app.metrics import CallbackMetric
+from app.models import ChatLog
+
+CHAT_LOG_QUEUE_SIZE = int(os.getenv("CHAT_LOG_QUEUE_SIZE", "10000"))
+CHAT_LOG_BATCH_SIZE = int(os.getenv("CHAT_LOG_BATCH_SIZE", "200"))
+CHAT_LOG_FLUSH_INTERVAL = float(os.getenv("CHAT_LOG_FLUSH_INTERVAL", "1.0"))
+# What to do when the queue is full: "drop_newest", "drop_oldest" or "block"
+CHAT_LOG_DROP_POLICY = os.getenv("CHAT_LOG_DROP_POLICY", "drop_newest")
+# Longest a request waits for queue space under the "block" policy (seconds)
+CHAT_LOG_PUT_TIMEOUT = float(os.getenv("CHAT_LOG_PUT_TIMEOUT", "0.1"))
+# Attempts per batch before it is counted as failed; the delay doubles after each one (seconds)
+CHAT_LOG_WRITE_ATTEMPTS = int(os.getenv("CHAT_LOG_WRITE_ATTEMPTS", "4"))
+CHAT_LOG_RETRY_DELAY = float(os.getenv("CHAT_LOG_RETRY_DELAY", "0.5"))
+
+DROP_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+
+class ChatLogWriter:
+    """
+    Background writer that batches ChatLog rows into multi-row INSERTs
+    and then folds each committed batch into the hourly analytics rollups.
+
+    Requests call `submit` and return immediately; a single worker task
+    flushes whenever `batch_size` rows are waiting or `flush_interval`
+    seconds have passed since the first one. `stop` drains what is queued.
+    """
+
+    def __init__(self, max_queue: int = CHAT_LOG_QUEUE_SIZE, batch_size: int = CHAT_LOG_BATCH_SIZE,
+                 flush_interval: float = CHAT_LOG_FLUSH_INTERVAL, drop_policy: str = CHAT_LOG_DROP_POLICY,
+                 put_timeout: float = CHAT_LOG_PUT_TIMEOUT, write_attempts: int = CHAT_LOG_WRITE_ATTEMPTS,
+                 retry_delay: float = CHAT_LOG_RETRY_DELAY):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"CHAT_LOG_DROP_POLICY must be one of {DROP_POLICIES}, got {drop_policy!r}")
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.put_timeout = put_timeout
+        self.write_attempts = max(1, write_attempts)
+        self.retry_delay = retry_delay
+        self.queue: Optional[asyncio.Queue] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retried = 0
+        self.fold_failed = 0
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        if self._task is None:
+            return
+        self._closed = True
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self.dropped += self.queue.qsize()
+            print(f"Chat log writer: gave up draining, {self.queue.qsize()} rows lost")
+            self._task.cancel()
+        self._task = None
+
+    async def submit(self, session_id: str, user_message: str, bot_response: str,
+                     topic: Optional[str] = None) -> bool:
+        entry = {
+            "session_id": session_id,
+            "user_message": user_message,
+            "bot_response": bot_response,
+            "topic": topic,
+            "timestamp": datetime.now(timezone.utc),
+        }
+        if self._task is None or self._closed:
+            # Not running (scripts, shutdown): write synchronously
+            await self._flush([entry])
+            return True
+        try:
+            self.queue.put_nowait(entry)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if self.drop_policy == "drop_oldest":
+            # The evicted row is the one lost; this one is queued
+            self.queue.get_nowait()
+            self.queue.put_nowait(entry)
+            self.dropped += 1
+            return True
+        elif self.drop_policy == "block":
+            try:
+                await asyncio.wait_for(self.queue.put(entry), self.put_timeout)
+                return True
+            except asyncio.TimeoutError:
+                pass
+        self.dropped += 1
+        return False
+
+    async def _collect(self) -> List[dict]:
+        loop = asyncio.get_running_loop()
+        try:
+            # Wake up periodically so a stop request is noticed
+            first = await asyncio.wait_for(self.queue.get(), self.flush_interval)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._closed or not self.queue.empty():
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    break
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while not (self._closed and self.queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    async def _insert(self, batch: List[dict]):
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(ChatLog).values(batch))
+            await db.commit()
+
+    async def _fold(self, batch: List[dict]):
+        async with AsyncSessionLocal() as db:
+            await fold_batch(db, batch)
+            await db.commit()
+
+    async def _attempt(self, what: str, write, batch: List[dict]) -> bool:
+        # Retried with backoff so a failover or a dropped connection does not lose the batch
+        for attempt in range(1, self.write_attempts + 1):
+            try:
+                await write(batch)
+                return True
+            except Exception as e:
+                if attempt == self.write_attempts:
+                    print(f"Chat log writer: failed to {what} {len(batch)} rows after {attempt} attempts: {e}")
+                    return False
+                self.retried += 1
+                print(f"Chat log writer: {what} failed (attempt {attempt}), retrying: {e}")
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    async def _flush(self, batch: List[dict]):
+        if not await self._attempt("write", self._insert, batch):
+            self.failed += len(batch)
+            return
+        self.written += len(batch)
+        # The raw rows are committed first and never depend on the analytics write
+        if not await self._attempt("fold", self._fold, batch):
+            self.fold_failed += len(batch)
+
+chat_log_writer = ChatLogWriter()
+
+CallbackMetric(
+    "chat_log_rows_total", "Chat log rows by outcome",
+    lambda: [({"result": r}, getattr(chat_log_writer, r)) for r in ("written", "dropped", "failed")],
+    labels=("result",), kind="counter"
+)
+CallbackMetric(
+    "chat_log_fold_failures_total", "Written chat log rows missing from the hourly rollups",
+    lambda: [({}, chat_log_writer.fold_failed)], kind="counter"
+)
+CallbackMetric(
+    "chat_log_write_retries_total", "Chat log batch writes that failed and were retried",
+    lambda: [({}, chat_log_writer.retried)], kind="counter"
+)
+CallbackMetric(
+    "chat_log_queue_depth", "Chat log rows waiting to be written",
+    lambda: [({}, chat_log_writer.queue.qsize() if chat_log_writer.queue else 0)]
+)
@@ -0,0 +1,51 @@
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Plural forms accepted for every keyword ("ad" -> "ads", "sale" -> "sales")
+INFLECTIONS = ("", "s", "es")
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str
+    value: str
+    start: int
+    end: int
+
+
+class KeywordMatcher:
+    """
+    Whole-word keyword lookup compiled once from a keyword -> value map.
+
+    Every keyword and its plural forms go into one hash table, so a message
+    is matched with a single pass over its tokens instead of one substring
+    scan per keyword. When two keywords share a form, the one listed first
+    in the map wins.
+    """
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.forms: Dict[str, KeywordMatch] = {}
+        for keyword, value in mapping.items():
+            word = keyword.lower()
+            if not TOKEN_RE.fullmatch(word):
+                raise ValueError(f"Keyword must be a single word: {keyword!r}")
+            for suffix in INFLECTIONS:
+                self.forms.setdefault(word + suffix, KeywordMatch(keyword, value, 0, 0))
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        lookup = self.forms.get
+        matches = []
+        for token in TOKEN_RE.finditer(text.lower()):
+            hit = lookup(token.group())
+            if hit is not None:
+                matches.append(hit._replace(start=token.start(), end=token.end()))
+        return matches
+
+    def first(self, text: str) -> Optional[KeywordMatch]:
+        lookup = self.forms.get
+        for token in TOKEN_RE.finditer(text.lower()):
+            hit = lookup(token.group())
+            if hit is not None:
+                return hit._replace(start=token.start(), end=token.end())
+        return None
@@ -0,0 +1,102 @@
+import math
+import os
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from app.chat_matcher import TOKEN_RE
+
+# Minimum BM25 score for a topic to be used instead of the fallback reply
+CHAT_MIN_SCORE = float(os.getenv("CHAT_MIN_SCORE", "2.0"))
+# A runner-up scoring at least this fraction of the winner is appended to the answer
+CHAT_COMBINE_RATIO = float(os.getenv("CHAT_COMBINE_RATIO", "0.75"))
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i if in is it its me my of on or our
+so that the their them this to us we what when where which who why will with you your
+""".split())
+
+
+class ScoredTopic(NamedTuple):
+    topic: str
+    score: float
+
+
+def stem(token: str) -> str:
+    # Same plural folding on both sides of the index
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def analyze(text: str) -> List[str]:
+    return [stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class RetrievalEngine:
+    """
+    BM25 ranking over topic answers and their keyword synonyms.
+
+    Term weights are computed once at build time and stored per term as a
+    pair of arrays (topic indices, weights), i.e. the rows of a sparse
+    term-topic matrix. A query gathers the rows of its own terms and sums
+    them with one vectorized bincount, so only the query's postings are
+    touched. Synonyms count as `synonym_boost` occurrences of the term.
+    """
+
+    def __init__(self, topics: Dict[str, str], synonyms: Dict[str, str],
+                 k1: float = 1.2, b: float = 0.75, synonym_boost: int = 3):
+        self.topic_keys = list(topics)
+        position = {key: i for i, key in enumerate(self.topic_keys)}
+
+        doc_terms: List[Counter] = []
+        for key, answer in topics.items():
+            counts = Counter(analyze(answer))
+            for term in analyze(key.replace("_", " ")):
+                counts[term] += synonym_boost
+            doc_terms.append(counts)
+        for keyword, topic in synonyms.items():
+            if topic in position:
+                for term in analyze(keyword):
+                    doc_terms[position[topic]][term] += synonym_boost
+
+        n_docs = len(doc_terms)
+        lengths = [sum(counts.values()) for counts in doc_terms]
+        avg_length = (sum(lengths) / n_docs) if n_docs else 0.0
+        doc_freq = Counter(term for counts in doc_terms for term in counts)
+
+        rows: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for doc, counts in enumerate(doc_terms):
+            norm = k1 * (1 - b + b * lengths[doc] / avg_length)
+            for term, tf in counts.items():
+                idf = math.log(1 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                rows[term].append((doc, idf * tf * (k1 + 1) / (tf + norm)))
+
+        self.n_docs = n_docs
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            term: (np.array([doc for doc, _ in row], dtype=np.int32),
+                   np.array([weight for _, weight in row], dtype=np.float64))
+            for term, row in rows.items()
+        }
+
+    def search(self, query: str, k: int = 3) -> List[ScoredTopic]:
+        hits = [self.postings[term] for term in set(analyze(query)) if term in self.postings]
+        if not hits:
+            return []
+        docs = np.concatenate([doc_ids for doc_ids, _ in hits])
+        weights = np.concatenate([term_weights for _, term_weights in hits])
+        scores = np.bincount(docs, weights=weights, minlength=self.n_docs)
+
+        k = min(k, self.n_docs)
+        best = np.argpartition(scores, -k)[-k:]
+        best = best[np.argsort(scores[best])[::-1]]
+        return [ScoredTopic(self.topic_keys[doc], float(scores[doc])) for doc in best if scores[doc] > 0]
+
+    def answer_topics(self, query: str, min_score: float = CHAT_MIN_SCORE,
+                      combine_ratio: float = CHAT_COMBINE_RATIO) -> List[ScoredTopic]:
+        # Winner plus a close runner-up; empty means "use the fallback reply"
+        ranked = [hit for hit in self.search(query, k=2) if hit.score >= min_score]
+        if len(ranked) == 2 and ranked[1].score < ranked[0].score * combine_ratio:
+            ranked.pop()
+        return ranked
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from app.content_cache import ContentSnapshot, section_cache
+from app.storage import PUBLIC_BASE_URL, STATIC_DIR
+
+BUNDLE_DIR = STATIC_DIR / "content"
+MANIFEST_PATH = BUNDLE_DIR / "manifest.json"
+# Older bundles kept for pages and CDN edges still pointing at them
+CONTENT_BUNDLE_KEEP = int(os.getenv("CONTENT_BUNDLE_KEEP", "5"))
+# Origin the bundles are fetched from (a CDN in front of /static); defaults to PUBLIC_BASE_URL / the request
+CONTENT_BUNDLE_BASE_URL = os.getenv("CONTENT_BUNDLE_BASE_URL")
+
+
+def bundle_url(name: str, base_url: Optional[str] = None) -> str:
+    base = (CONTENT_BUNDLE_BASE_URL or PUBLIC_BASE_URL or base_url or "").rstrip("/")
+    return f"{base}/static/content/{name}"
+
+
+def write_atomic(path: Path, data: bytes):
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".bundle-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def prune_bundles(current: str, keep: int = CONTENT_BUNDLE_KEEP):
+    bundles = sorted(
+        (path for path in BUNDLE_DIR.glob("*.json") if path != MANIFEST_PATH and path.name != current),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in bundles[max(0, keep - 1):]:
+        path.unlink(missing_ok=True)
+
+
+def write_bundle(snapshot: ContentSnapshot) -> dict:
+    """
+    Write `snapshot` as static/content/<sha256>.json and point the manifest at it.
+
+    The bundle body is byte-for-byte the /api/public/all-content response, and
+    its name is the hash of that body, so it can be cached forever. Publishing
+    unchanged content writes nothing.
+    """
+    BUNDLE_DIR.mkdir(parents=True, exist_ok=True)
+    digest = snapshot.etag.strip('"')
+    name = f"{digest}.json"
+    path = BUNDLE_DIR / name
+    if not path.exists():
+        write_atomic(path, snapshot.body)
+
+    manifest = read_manifest()
+    if manifest is None or manifest.get("bundle") != name:
+        manifest = {
+            "version": digest,
+            "bundle": name,
+            "bytes": len(snapshot.body),
+            "content_loaded_at": snapshot.loaded_at,
+            "published_at": time.time(),
+        }
+        write_atomic(MANIFEST_PATH, json.dumps(manifest).encode())
+    prune_bundles(name)
+    return manifest
+
+
+def read_manifest() -> Optional[dict]:
+    try:
+        return json.loads(MANIFEST_PATH.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+async def publish_snapshot(snapshot: Optional[ContentSnapshot]) -> Optional[dict]:
+    # Best effort after admin writes: a failed publish must not fail the write itself
+    if snapshot is None:
+        return None
+    try:
+        return await asyncio.to_thread(write_bundle, snapshot)
+    except OSError as e:
+        print(f"Content bundle publish failed: {e}")
+        return None
+
+
+async def publish_from_database() -> Optional[dict]:
+    # After anything that commits section changes (admin writes, seed.py, extract_inline_images.py):
+    # reload this process's section cache and republish the bundle, so the manifest never lags behind
+    await section_cache.refresh(force=True)
+    return await publish_snapshot(section_cache.snapshot)
@@ -0,0 +1,267 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import AsyncSessionLocal, engine
+from app.metrics import CallbackMetric
+from app.models import Section
+from app.schemas import SectionResponse
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is still offered without it
+    brotli = None
+
+# Postgres channel used to tell the other workers that sections changed
+NOTIFY_CHANNEL = "section_cache"
+
+# How long a worker trusts its copy when it cannot LISTEN for changes (seconds)
+CONTENT_CACHE_TTL = float(os.getenv("CONTENT_CACHE_TTL", "30"))
+# Longest a public request waits for the database before the last good copy is served (seconds)
+CONTENT_DB_BUDGET = float(os.getenv("CONTENT_DB_BUDGET_MS", "250")) / 1000
+# A revalidation still running after this long is abandoned and retried (seconds)
+CONTENT_REFRESH_TIMEOUT = float(os.getenv("CONTENT_REFRESH_TIMEOUT", "10"))
+# Pause between revalidation attempts while the database is failing (seconds)
+CONTENT_RETRY_INTERVAL = float(os.getenv("CONTENT_RETRY_INTERVAL", "5"))
+# Last known good content on local disk, served when the database is slow or down ("" disables)
+CONTENT_SNAPSHOT_PATH = os.getenv("CONTENT_SNAPSHOT_PATH", "var/content_snapshot.json")
+
+
+class ContentSnapshot:
+    """Ready-to-send `/all-content` body in every encoding we offer."""
+
+    def __init__(self, sections: List[SectionResponse], loaded_at: float):
+        self.loaded_at = loaded_at  # Wall clock time the content was read from the database
+        payload = jsonable_encoder(sections)
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()}"'
+        self.encoded = {"gzip": gzip.compress(self.body, compresslevel=6)}
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(self.body, quality=5)
+
+
+def write_snapshot_file(path: Path, snapshot: ContentSnapshot):
+    # Written to a temp file and renamed, so readers never see a partial snapshot
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(b'{"loaded_at":%r,"sections":' % snapshot.loaded_at + snapshot.body + b"}")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def read_snapshot_file(path: Path):
+    data = json.loads(path.read_bytes())
+    sections = {item["key"]: SectionResponse(**item) for item in data["sections"]}
+    return sections, ContentSnapshot(list(sections.values()), data["loaded_at"])
+
+
+class SectionCache:
+    """
+    In-process copy of every Section, validated once per load.
+
+    Public reads are served from memory. Admin writes call `notify_change`
+    inside their transaction and `refresh` after commit; every other worker
+    receives the NOTIFY and reloads on its next read. Without a LISTEN
+    connection the copy is revalidated after CONTENT_CACHE_TTL seconds.
+
+    Reads never wait on the database longer than CONTENT_DB_BUDGET once
+    there is something to serve: past the budget, or when the database
+    fails, the previous copy is served (marked stale) while revalidation
+    continues in the background. Every new copy is also saved to
+    CONTENT_SNAPSHOT_PATH, which a restarted worker serves before its
+    first successful database read.
+    """
+
+    def __init__(self, ttl: float = CONTENT_CACHE_TTL, snapshot_path: Optional[str] = CONTENT_SNAPSHOT_PATH):
+        self.ttl = ttl
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.version = 0
+        self.sections: Dict[str, SectionResponse] = {}
+        self.snapshot: Optional[ContentSnapshot] = None
+        self.loaded_at: Optional[float] = None
+        # Bumped by every invalidation, so one that lands during a reload is not lost
+        self.generation = 0
+        self.listening = False
+        self.failures = 0
+        self._lock = asyncio.Lock()
+        self._listen_conn = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._retry_at = 0.0
+
+    def is_fresh(self) -> bool:
+        if self.loaded_at is None:
+            return False
+        if self.listening:
+            return True
+        return time.monotonic() - self.loaded_at < self.ttl
+
+    def invalidate(self):
+        self.generation += 1
+        self.loaded_at = None
+
+    async def refresh(self, force: bool = False):
+        seen = self.version
+        async with self._lock:
+            # Another request reloaded while we were waiting for the lock
+            if not force and self.version != seen and self.is_fresh():
+                return
+            generation = self.generation
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(Section))
+                rows = result.scalars().all()
+            sections = {
+                row.key: SectionResponse(key=row.key, content=row.content, last_updated=row.last_updated, version=row.version)
+                for row in rows
+            }
+            # Compressing multi-megabyte bodies would stall the event loop
+            snapshot = await asyncio.to_thread(ContentSnapshot, list(sections.values()), time.time())
+            changed = self.snapshot is None or snapshot.etag != self.snapshot.etag
+            self.sections = sections
+            self.snapshot = snapshot
+            self.version += 1
+            # Invalidated while loading: serve this copy, but reload on the next read
+            self.loaded_at = time.monotonic() if self.generation == generation else None
+            if changed and self.snapshot_path is not None:
+                try:
+                    await asyncio.to_thread(write_snapshot_file, self.snapshot_path, snapshot)
+                except OSError as e:
+                    print(f"Could not save content snapshot to {self.snapshot_path}: {e}")
+
+    async def load_from_disk(self) -> bool:
+        # Serves as the last known good copy until the database answers; never counts as fresh
+        if self.snapshot is not None or self.snapshot_path is None or not self.snapshot_path.exists():
+            return False
+        try:
+            sections, snapshot = await asyncio.to_thread(read_snapshot_file, self.snapshot_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable content snapshot {self.snapshot_path}: {e}")
+            return False
+        if self.snapshot is None:
+            self.sections = sections
+            self.snapshot = snapshot
+        return True
+
+    def _background_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(asyncio.wait_for(self.refresh(), CONTENT_REFRESH_TIMEOUT))
+            self._refresh_task.add_done_callback(self._refresh_done)
+        return self._refresh_task
+
+    def _refresh_done(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            self.failures = 0
+            return
+        self.failures += 1
+        self._retry_at = time.monotonic() + CONTENT_RETRY_INTERVAL
+        print(f"Section cache refresh failed, serving the previous copy: {error!r}")
+
+    async def ensure_current(self):
+        if self.is_fresh():
+            return
+        if self.snapshot is None:
+            await self.load_from_disk()
+        if self.snapshot is None:
+            # Nothing to fall back to: this read has to wait for the database
+            await self.refresh()
+            return
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return  # Already revalidating; only the read that started it waits
+        if time.monotonic() < self._retry_at:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._background_refresh()), CONTENT_DB_BUDGET)
+        except asyncio.TimeoutError:
+            pass  # Keeps running in the background
+        except Exception:
+            pass  # Reported by _refresh_done
+
+    def staleness_headers(self) -> Dict[str, str]:
+        # Only set while serving content the database could not confirm in time
+        if self.is_fresh() or self.snapshot is None:
+            return {}
+        return {
+            "Age": str(max(0, int(time.time() - self.snapshot.loaded_at))),
+            "X-Content-Stale": "1",
+        }
+
+    async def get_all(self) -> List[SectionResponse]:
+        await self.ensure_current()
+        return list(self.sections.values())
+
+    async def get_snapshot(self) -> ContentSnapshot:
+        await self.ensure_current()
+        return self.snapshot
+
+    async def get(self, key: str) -> Optional[SectionResponse]:
+        await self.ensure_current()
+        return self.sections.get(key)
+
+    # --- Cross-worker coherence (Postgres LISTEN/NOTIFY) ---
+
+    async def notify_change(self, db: AsyncSession):
+        # Delivered to listeners only when the surrounding transaction commits
+        if engine.dialect.name == "postgresql":
+            await db.execute(text("SELECT pg_notify(:channel, '')"), {"channel": NOTIFY_CHANNEL})
+
+    async def start_listener(self):
+        if engine.dialect.name != "postgresql":
+            return
+        try:
+            conn = await engine.connect()
+            raw = await conn.get_raw_connection()
+            driver_conn = raw.driver_connection
+            await driver_conn.add_listener(NOTIFY_CHANNEL, self._on_notify)
+            driver_conn.add_termination_listener(self._on_terminate)
+        except Exception as e:
+            print(f"Section cache listener unavailable, using TTL revalidation: {e}")
+            return
+        self._listen_conn = conn
+        self.listening = True
+        # Anything written before we started listening must be reloaded
+        self.invalidate()
+
+    async def stop_listener(self):
+        self.listening = False
+        if self._listen_conn is not None:
+            await self._listen_conn.close()
+            self._listen_conn = None
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self.invalidate()
+
+    def _on_terminate(self, connection):
+        print("Section cache listener lost its connection, using TTL revalidation.")
+        self.listening = False
+        self.invalidate()
+
+
+section_cache = SectionCache()
+
+CallbackMetric("section_cache_version", "Reloads of the in-process section cache", lambda: [({}, section_cache.version)], kind="counter")
+CallbackMetric("section_cache_listening", "1 when cross-worker invalidation via LISTEN is active", lambda: [({}, int(section_cache.listening))])
+CallbackMetric("section_cache_refresh_failures", "Consecutive failed section cache revalidations", lambda: [({}, section_cache.failures)])
+CallbackMetric(
+    "section_cache_age_seconds", "Seconds since the served content was read from the database",
+    lambda: [({}, time.time() - section_cache.snapshot.loaded_at if section_cache.snapshot else None)]
+)
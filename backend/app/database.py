@@ -1,9 +1,12 @@
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.metrics import Histogram
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
+import time
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -16,13 +19,67 @@ else:
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://", 1)
     elif DATABASE_URL.startswith("postgresql://") and "asyncpg" not in DATABASE_URL:
          DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+    # Embedded mode: sqlite:///smartpromo.db -> sqlite+aiosqlite:///smartpromo.db
+    elif DATABASE_URL.startswith("sqlite://"):
+        DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+# A pool would give every connection its own empty in-memory database
+IS_SQLITE_MEMORY = IS_SQLITE and (":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/").endswith("aiosqlite:"))
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the single writer;
+# synchronous=NORMAL is durable across app crashes under WAL (a power loss may drop the last commits)
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "cache_size": os.getenv("SQLITE_CACHE_SIZE", "-65536"), # negative = KiB, i.e. 64 MiB
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "temp_store": "MEMORY",
+}
 
 # Handle SSL for Production (Vercel, Neon, Render)
 connect_args = {}
 if "vercel" in DATABASE_URL or "neon" in DATABASE_URL or "render" in DATABASE_URL:
     connect_args = {"server_settings": {"jit": "off"}}
 
-engine = create_async_engine(DATABASE_URL, echo=True, connect_args=connect_args)
+# Full statement echo is a debug aid only; see app/instrumentation.py for sampled SQL logging
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool"
+)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # Records how long each checkout waited for a free (or newly opened) connection
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+engine_options = {}
+if not IS_SQLITE_MEMORY:
+    engine_options["poolclass"] = TimedQueuePool
+
+engine = create_async_engine(DATABASE_URL, echo=SQL_ECHO, connect_args=connect_args, **engine_options)
+
+if IS_SQLITE:
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            if IS_SQLITE_MEMORY and name in ("journal_mode", "mmap_size"):
+                continue # In-memory databases have no WAL file to map
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def dialect_insert(model):
+    # INSERT with .on_conflict_do_update / .on_conflict_do_nothing for the configured backend
+    return sqlite_insert(model) if IS_SQLITE else pg_insert(model)
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.storage import UPLOAD_DIR
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Optional: without Pillow originals are served as-is
+    Image = None
+
+# Widths variants are rendered at; requests are rounded up to the next bucket
+WIDTH_BUCKETS = tuple(int(w) for w in os.getenv("IMAGE_WIDTH_BUCKETS", "96,320,640,960,1280,1920").split(","))
+# Total bytes of rendered variants kept on disk before the least recently used are evicted
+IMAGE_VARIANT_BUDGET = int(os.getenv("IMAGE_VARIANT_BUDGET", str(512 * 1024 * 1024)))
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "80"))
+
+# Only content-addressed uploads (see app/storage.py IMAGE_EXTENSIONS) can have variants
+UPLOAD_NAME_RE = re.compile(r"^([0-9a-f]{64})\.(jpg|png|webp|gif|avif)$")
+VARIANT_GLOB = "*-w*.*"
+SAVE_FORMATS = {"webp": "WEBP", "avif": "AVIF", "jpg": "JPEG", "jpeg": "JPEG", "png": "PNG"}
+
+_render_locks: Dict[Path, asyncio.Lock] = {}
+
+
+def avif_supported() -> bool:
+    return Image is not None and bool(features.check("avif"))
+
+
+def bucket_for(width: Optional[int]) -> Optional[int]:
+    if not width:
+        return None
+    for bucket in WIDTH_BUCKETS:
+        if bucket >= width:
+            return bucket
+    return WIDTH_BUCKETS[-1]
+
+
+def choose_format(accept: str, original_ext: str) -> str:
+    accept = accept.lower()
+    if "image/avif" in accept and avif_supported():
+        return "avif"
+    if "image/webp" in accept:
+        return "webp"
+    # Browsers without WebP get a resized copy in the original format
+    return original_ext if original_ext in SAVE_FORMATS else "png"
+
+
+def variant_path(digest: str, width: Optional[int], fmt: str) -> Path:
+    return UPLOAD_DIR / f"{digest}-w{width or 0}.{fmt}"
+
+
+def render_variant(source: Path, target: Path, width: Optional[int], fmt: str):
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if width and img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        if fmt in ("jpg", "jpeg") and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA")
+        fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=".variant-")
+        with os.fdopen(fd, "wb") as out:
+            img.save(out, SAVE_FORMATS[fmt], quality=IMAGE_QUALITY)
+    os.replace(temp_path, target)
+    enforce_budget()
+
+
+def touch(path: Path):
+    # mtime doubles as "last served" for LRU eviction (atime is often disabled)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def enforce_budget(budget: int = IMAGE_VARIANT_BUDGET):
+    variants = []
+    for path in UPLOAD_DIR.glob(VARIANT_GLOB):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        variants.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in variants)
+    for _, size, path in sorted(variants):
+        if total <= budget:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+async def get_variant(name: str, width: Optional[int], accept: str) -> Optional[Path]:
+    """
+    Path of the best rendition of upload `name` for `width` and `accept`.
+
+    Variants are rendered on first request (in a worker thread, one render
+    per variant at a time) and reused afterwards. Returns the original when
+    Pillow is missing or the file is not a raster image, None if unknown.
+    """
+    match = UPLOAD_NAME_RE.match(name)
+    source = UPLOAD_DIR / name
+    if not match or not source.is_file():
+        return None
+    if Image is None or match.group(2) == "gif":
+        # Animated GIFs would lose their frames
+        return source
+
+    digest, ext = match.groups()
+    target = variant_path(digest, bucket_for(width), choose_format(accept, ext))
+    if target.exists():
+        await asyncio.to_thread(touch, target)
+        return target
+
+    lock = _render_locks.setdefault(target, asyncio.Lock())
+    try:
+        async with lock:
+            if not target.exists():
+                await asyncio.to_thread(render_variant, source, target, bucket_for(width), target.suffix[1:])
+    except Exception as e:
+        print(f"Image variant error for {name}: {e}")
+        return source
+    finally:
+        _render_locks.pop(target, None)
+    return target
@@ -0,0 +1,114 @@
+import os
+import random
+import time
+
+from sqlalchemy import event
+
+from app.metrics import CallbackMetric, Counter, Gauge, Histogram
+from app.profiling import current_profile
+
+# Fraction of SQL statements logged with their duration (0 disables, 1 logs all)
+SQL_LOG_SAMPLE_RATE = float(os.getenv("SQL_LOG_SAMPLE_RATE", "0"))
+
+# Routers are told apart by their mount prefix in app/main.py
+ROUTER_PREFIXES = (
+    ("/api/public", "public"),
+    ("/api/admin", "admin"),
+    ("/api/chat", "chat"),
+    ("/api/upload", "upload"),
+    ("/api/auth", "auth"),
+    ("/static", "static"),
+    ("/metrics", "metrics"),
+)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency from first byte received to last byte sent",
+    labels=("router", "method", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being served",
+    labels=("router",),
+)
+SQL_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time measured around the DBAPI cursor",
+    labels=("operation",),
+)
+SQL_ERRORS = Counter("db_statement_errors_total", "SQL statements that raised", labels=("operation",))
+
+
+def router_for(path: str) -> str:
+    for prefix, name in ROUTER_PREFIXES:
+        if path.startswith(prefix):
+            return name
+    return "other"
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: no per-request Request object, streaming responses are timed to the end
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        router = router_for(scope["path"])
+        started = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(1, router=router)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.inc(-1, router=router)
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started, router=router, method=scope["method"], status=status
+            )
+
+
+def statement_operation(statement: str) -> str:
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+def instrument_engine(engine):
+    """Attach SQL timing and pool gauges to an AsyncEngine (once, at startup)."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_started
+        SQL_DURATION.observe(elapsed, operation=statement_operation(statement))
+        profile = current_profile.get()
+        if profile is not None:
+            profile.sql_count += 1
+            profile.sql_time += elapsed
+        if SQL_LOG_SAMPLE_RATE and random.random() < SQL_LOG_SAMPLE_RATE:
+            print(f"SQL {elapsed * 1000:.2f} ms: {statement}")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        SQL_ERRORS.inc(operation=statement_operation(context.statement or ""))
+
+    pool = sync_engine.pool
+
+    def pool_stats():
+        # Only queue pools have a size / overflow; other pools report what they can
+        for stat in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, stat):
+                yield {"stat": stat}, getattr(pool, stat)()
+
+    CallbackMetric("db_pool_connections", "Connection pool state", pool_stats, labels=("stat",))
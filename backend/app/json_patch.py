@@ -0,0 +1,161 @@
+import copy
+from typing import Any, List, Optional
+
+# RFC 6902 operations and the members each one needs besides "op" and "path"
+OPERATIONS = {
+    "add": ("value",),
+    "remove": (),
+    "replace": ("value",),
+    "move": ("from",),
+    "copy": ("from",),
+    "test": ("value",),
+}
+
+
+class JsonPatchError(Exception):
+    # The patch is malformed or does not apply to the document
+    pass
+
+
+class JsonPatchConflict(JsonPatchError):
+    # A "test" operation failed
+    pass
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split an RFC 6901 JSON Pointer into unescaped reference tokens."""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def validate_patch(patch: Any) -> List[dict]:
+    if not isinstance(patch, list):
+        raise JsonPatchError("A JSON Patch document must be an array of operations")
+    for index, operation in enumerate(patch):
+        if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+            raise JsonPatchError(f"Operation {index} has no valid 'op'")
+        for member in ("path",) + OPERATIONS[operation["op"]]:
+            if member not in operation:
+                raise JsonPatchError(f"Operation {index} ({operation['op']}) is missing '{member}'")
+        parse_pointer(operation["path"])
+        if "from" in operation:
+            parse_pointer(operation["from"])
+    return patch
+
+
+def array_index(token: str, array: list, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(array)
+    # No leading zeros or signs (RFC 6901 section 4)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def resolve_parent(doc: Any, tokens: List[str]):
+    target = doc
+    for token in tokens[:-1]:
+        if isinstance(target, dict):
+            if token not in target:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[array_index(token, target)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return target
+
+
+def get_value(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        return doc
+    parent = resolve_parent(doc, tokens)
+    token = tokens[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[array_index(token, parent)]
+    raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def add_value(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = resolve_parent(doc, tokens)
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(array_index(tokens[-1], parent, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to a scalar at /{'/'.join(tokens)}")
+    return doc
+
+
+def remove_value(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the whole document")
+    value = get_value(doc, tokens)
+    parent = resolve_parent(doc, tokens)
+    if isinstance(parent, dict):
+        del parent[tokens[-1]]
+    else:
+        del parent[array_index(tokens[-1], parent)]
+    return value
+
+
+def apply_patch(doc: Any, patch: List[dict]) -> Any:
+    """
+    Apply an RFC 6902 patch and return the new document.
+
+    `doc` is left untouched; the patch is applied to a copy so a failing
+    operation never leaves a half-patched result behind.
+    """
+    doc = copy.deepcopy(doc)
+    for operation in validate_patch(patch):
+        op = operation["op"]
+        path = parse_pointer(operation["path"])
+        if op == "add":
+            doc = add_value(doc, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            remove_value(doc, path)
+        elif op == "replace":
+            get_value(doc, path)  # must exist
+            parent = resolve_parent(doc, path) if path else None
+            if isinstance(parent, list):
+                parent[array_index(path[-1], parent)] = copy.deepcopy(operation["value"])
+            else:
+                # Object members are overwritten in place, keeping key order
+                doc = add_value(doc, path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            source = parse_pointer(operation["from"])
+            if path[:len(source)] == source and path != source:
+                raise JsonPatchError("Cannot move a value into one of its children")
+            doc = add_value(doc, path, remove_value(doc, source))
+        elif op == "copy":
+            value = get_value(doc, parse_pointer(operation["from"]))
+            doc = add_value(doc, path, copy.deepcopy(value))
+        elif op == "test":
+            if get_value(doc, path) != operation["value"]:
+                raise JsonPatchConflict(f"Test failed at {operation['path']}")
+    return doc
+
+
+def replace_paths(patch: List[dict]) -> Optional[List[tuple]]:
+    """
+    [(tokens, value), ...] if every operation is a "replace" below the root.
+
+    Those patches can be applied in the database with jsonb_set instead of
+    loading and rewriting the whole document. Returns None otherwise.
+    """
+    if not patch or any(operation["op"] != "replace" for operation in patch):
+        return None
+    paths = [(parse_pointer(operation["path"]), operation["value"]) for operation in patch]
+    return paths if all(tokens for tokens, _ in paths) else None
@@ -1,19 +1,25 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import public, admin, chat, upload, auth
-from app.database import engine, Base
-import asyncio
+from app.routers import public, admin, chat, upload, auth, images
+from app import BOOT_STARTED
+from app.database import engine
+from app.migrations import schema_gate
+from app.content_cache import section_cache
+from app.chat_log_writer import chat_log_writer
+from app.partitions import partition_maintainer
+from app.instrumentation import MetricsMiddleware, instrument_engine
+from app.profiling import ProfilingMiddleware
+from app.metrics import Gauge, render_metrics
+from app.storage import STATIC_DIR, LazyStaticFiles, UploadSizeLimitMiddleware
+from contextlib import contextmanager
+from sqlalchemy.exc import DBAPIError
+import hmac
+import time
 
 app = FastAPI(title="Smart Promo & Insights Assistant API")
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
 origins = [
     "http://localhost:3000",
@@ -24,6 +30,12 @@ origins = [
 if os.getenv("FRONTEND_URL"):
     origins.append(os.getenv("FRONTEND_URL"))
 
+# add_middleware wraps outward, so the first one added runs closest to the routes.
+# Innermost, so its 413s still carry CORS headers
+app.add_middleware(UploadSizeLimitMiddleware)
+# Inside CORS so profiled timings match what the handler saw
+app.add_middleware(ProfilingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -32,17 +44,84 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so CORS preflights and errors are timed too
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+
 app.include_router(public.router, prefix="/api/public", tags=["Public Content"])
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 app.include_router(chat.router, prefix="/api/chat", tags=["Chatbot"])
 app.include_router(upload.router, prefix="/api/upload", tags=["Upload"])
+# Resized / re-encoded uploads; must be registered before the /static mount that would shadow it
+app.include_router(images.router, prefix="/static/img", tags=["Images"])
+
+# Mount static files (the directory is created by the first upload)
+app.mount("/static", LazyStaticFiles(directory=STATIC_DIR, check_dir=False), name="static")
+
+BOOT_PHASE_SECONDS = Gauge(
+    "app_boot_phase_seconds",
+    "Duration of each cold start phase of this process",
+    labels=("phase",),
+)
+boot_phases = {}
+
+@contextmanager
+def boot_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        boot_phases[name] = time.perf_counter() - started
+        BOOT_PHASE_SECONDS.set(boot_phases[name], phase=name)
+
+# Interpreter start of `app` up to here: module imports and app construction
+boot_phases["import"] = time.perf_counter() - BOOT_STARTED
+BOOT_PHASE_SECONDS.set(boot_phases["import"], phase="import")
 
 @app.on_event("startup")
 async def startup():
-    # In production, use Alembic. For quick proto, create tables here.
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # The last known good content first, so a down database still leaves something to serve
+    with boot_phase("snapshot"):
+        await section_cache.load_from_disk()
+    # One SELECT when the schema is current; retried in the background if the database is down
+    with boot_phase("schema"):
+        await schema_gate.start(engine)
+    # Load sections now so the first visitor does not pay for it (from disk if the database is slow)
+    with boot_phase("section_cache"):
+        try:
+            await section_cache.ensure_current()
+        except (OSError, DBAPIError) as e:
+            print(f"Section cache not loaded at boot, will retry on the first read: {e!r}")
+    with boot_phase("listener"):
+        await section_cache.start_listener()
+    with boot_phase("partitions"):
+        await partition_maintainer.start()
+    with boot_phase("chat_log_writer"):
+        await chat_log_writer.start()
+    boot_phases["total"] = time.perf_counter() - BOOT_STARTED
+    BOOT_PHASE_SECONDS.set(boot_phases["total"], phase="total")
+    print("Boot: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in boot_phases.items()))
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Drain queued chat logs before the process exits
+    await chat_log_writer.stop()
+    await partition_maintainer.stop()
+    await section_cache.stop_listener()
+    await schema_gate.stop()
+
+# Shared secret the scraper sends as a Bearer token; without one /metrics is not served at all
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+if METRICS_TOKEN:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(request: Request):
+        # Compared as bytes: compare_digest rejects non-ASCII str, which would surface as a 500
+        supplied = request.headers.get("authorization", "").encode("latin-1")
+        if not hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}".encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 def read_root():
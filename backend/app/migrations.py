@@ -0,0 +1,130 @@
+import asyncio
+import os
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import delete, inspect, text
+from sqlalchemy.exc import DBAPIError
+
+from app.database import Base
+from app.models import SchemaVersion
+
+# Serializes migrations when several workers boot at once (Postgres only)
+MIGRATION_LOCK_ID = 72_810_002
+# Longest a boot-time schema check may take, and the wait between retries while the database is down (seconds)
+MIGRATION_TIMEOUT = float(os.getenv("MIGRATION_TIMEOUT", "10"))
+MIGRATION_RETRY_INTERVAL = float(os.getenv("MIGRATION_RETRY_INTERVAL", "5"))
+
+
+def create_tables(conn):
+    Base.metadata.create_all(conn)
+
+
+def add_columns(table_name: str, *column_names: str) -> Callable:
+    # create_all does not add columns to existing tables; the type and default come from the model
+    def migrate(conn):
+        existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+        for name in column_names:
+            if name in existing:
+                continue
+            column = Base.metadata.tables[table_name].c[name]
+            ddl = f"ALTER TABLE {table_name} ADD COLUMN {name} {column.type.compile(conn.dialect)}"
+            if column.server_default is not None:
+                ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+            conn.execute(text(ddl))
+    return migrate
+
+
+# MIGRATIONS[i] takes the schema from version i to i + 1. Databases that predate
+# versioning start at 0 whatever their shape, so every step must be idempotent.
+MIGRATIONS: List[Callable] = [
+    create_tables,
+    add_columns("chat_logs", "topic"),
+    add_columns("sections", "version", "content_hash"),
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+async def current_version(engine) -> int:
+    try:
+        async with engine.connect() as conn:
+            return (await conn.execute(text("SELECT max(version) FROM schema_version"))).scalar() or 0
+    except DBAPIError:
+        # No schema_version table yet
+        return 0
+
+
+async def migrate(engine) -> int:
+    """
+    Bring the schema up to SCHEMA_VERSION and return the number of steps run.
+
+    An up-to-date database costs one SELECT, which keeps cold starts fast.
+    """
+    version = await current_version(engine)
+    if version >= SCHEMA_VERSION:
+        if version > SCHEMA_VERSION:
+            print(f"WARNING: database schema is version {version}, this code expects {SCHEMA_VERSION}")
+        return 0
+
+    async with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        await conn.run_sync(SchemaVersion.__table__.create, checkfirst=True)
+        # Another worker may have migrated while we waited for the lock
+        version = (await conn.execute(text("SELECT max(version) FROM schema_version"))).scalar() or 0
+        steps = MIGRATIONS[version:]
+        for number, step in enumerate(steps, start=version + 1):
+            started = time.perf_counter()
+            await conn.run_sync(step)
+            print(f"Schema migrated to version {number} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        if steps:
+            await conn.execute(delete(SchemaVersion))
+            await conn.execute(SchemaVersion.__table__.insert().values(version=SCHEMA_VERSION))
+    return len(steps)
+
+
+class SchemaGate:
+    """
+    Runs `migrate` at boot without letting an unreachable database fail the boot.
+
+    When the first attempt fails the process starts anyway (public content is
+    served from the disk snapshot, see app/content_cache.py) and the migration
+    is retried in the background. Writers check `ready` and back off until then.
+    """
+
+    def __init__(self, timeout: float = MIGRATION_TIMEOUT, retry_interval: float = MIGRATION_RETRY_INTERVAL):
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.ready = False
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, engine) -> bool:
+        if not await self.attempt(engine):
+            self._task = asyncio.create_task(self._retry(engine))
+        return self.ready
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def attempt(self, engine) -> bool:
+        try:
+            await asyncio.wait_for(migrate(engine), self.timeout)
+        except (OSError, DBAPIError, asyncio.TimeoutError) as e:
+            self.failures += 1
+            if self.failures == 1:
+                print(f"Schema check failed, retrying every {self.retry_interval:g} s: {e!r}")
+            return False
+        self.ready = True
+        return True
+
+    async def _retry(self, engine):
+        while not self.ready:
+            await asyncio.sleep(self.retry_interval)
+            await self.attempt(engine)
+        print("Schema check succeeded; admin writes are enabled.")
+
+
+schema_gate = SchemaGate()
@@ -1,23 +1,58 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, JSON
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, IS_SQLITE
+
+# JSONB on Postgres, JSON text (queryable with the JSON1 functions) on SQLite
+PortableJSON = JSON().with_variant(JSONB(), "postgresql")
 
 class Section(Base):
     __tablename__ = "sections"
 
     key = Column(String, primary_key=True, index=True) # e.g., 'hero', 'features'
-    content = Column(JSONB, nullable=False) # The structured content
+    content = Column(PortableJSON, nullable=False) # The structured content
+    version = Column(Integer, nullable=False, default=1, server_default="1") # Bumped on every write; sent as the ETag
+    content_hash = Column(String(64), nullable=True) # SHA-256 of canonical content, see app/section_store.py; NULL = unknown
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 class ChatLog(Base):
     __tablename__ = "chat_logs"
+    # Range-partitioned by timestamp, see app/partitions.py
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
-    id = Column(Integer, primary_key=True, index=True)
+    # SQLite only autoincrements a lone INTEGER PRIMARY KEY (the rowid)
+    id = Column(BigInteger().with_variant(Integer(), "sqlite"), primary_key=True, autoincrement=True, index=True)
     session_id = Column(String, index=True)
     user_message = Column(Text)
     bot_response = Column(Text)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    topic = Column(String, nullable=True) # Matched topic / small talk intent; NULL = fallback reply
+    # Part of the primary key because Postgres requires the partition key in unique constraints
+    # (SQLite has no partitions, and a composite key would stop `id` from autoincrementing)
+    timestamp = Column(DateTime(timezone=True), primary_key=not IS_SQLITE, server_default=func.now())
+
+# --- Chat analytics rollups (maintained by the chat log writer) ---
+
+class ChatHourlyStats(Base):
+    __tablename__ = "chat_hourly_stats"
+
+    hour = Column(DateTime(timezone=True), primary_key=True) # UTC, truncated to the hour
+    messages = Column(Integer, nullable=False, default=0)
+    fallbacks = Column(Integer, nullable=False, default=0)
+    sessions = Column(Integer, nullable=False, default=0) # Distinct sessions active in the hour
+
+class ChatTopicRollup(Base):
+    __tablename__ = "chat_topic_rollups"
+
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    topic = Column(String, primary_key=True)
+    messages = Column(Integer, nullable=False, default=0)
+
+class ChatSessionHour(Base):
+    # One row per (hour, session) so session counts stay exact across batches and workers
+    __tablename__ = "chat_session_hours"
+
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    session_id = Column(String, primary_key=True)
 
 class User(Base):
     __tablename__ = "users"
@@ -25,3 +60,9 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+
+class SchemaVersion(Base):
+    # Single row holding the version app/migrations.py last brought the schema to
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
@@ -0,0 +1,270 @@
+import asyncio
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, delete, select, table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.chat_export import EXPORT_COLUMNS, export_chat_logs
+from app.database import engine
+from app.models import ChatSessionHour
+
+# "month", "week" or "day"
+CHAT_LOG_PARTITION_INTERVAL = os.getenv("CHAT_LOG_PARTITION_INTERVAL", "month")
+# Partitions ending more than this many days ago are archived and dropped (0 keeps everything)
+CHAT_LOG_RETENTION_DAYS = int(os.getenv("CHAT_LOG_RETENTION_DAYS", "365"))
+# Future partitions kept ready so inserts never hit a missing range
+CHAT_LOG_PARTITIONS_AHEAD = int(os.getenv("CHAT_LOG_PARTITIONS_AHEAD", "2"))
+CHAT_LOG_ARCHIVE_DIR = Path(os.getenv("CHAT_LOG_ARCHIVE_DIR", "archive/chat_logs"))
+# Seconds between maintenance runs in the API process
+CHAT_LOG_MAINTENANCE_INTERVAL = float(os.getenv("CHAT_LOG_MAINTENANCE_INTERVAL", "3600"))
+# chat_session_hours rows only matter while an hour can still receive logs
+SESSION_HOURS_RETENTION = timedelta(days=2)
+
+PARENT_TABLE = "chat_logs"
+PARTITION_PREFIX = "chat_logs_p"
+INTERVALS = ("month", "week", "day")
+# Arbitrary app-wide key so only one worker runs maintenance at a time
+MAINTENANCE_LOCK_ID = 72_810_001
+
+
+def partition_start(ts: datetime, interval: str = CHAT_LOG_PARTITION_INTERVAL) -> datetime:
+    ts = ts.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if interval == "month":
+        return ts.replace(day=1)
+    if interval == "week":
+        return ts - timedelta(days=ts.weekday())
+    if interval == "day":
+        return ts
+    raise ValueError(f"CHAT_LOG_PARTITION_INTERVAL must be one of {INTERVALS}, got {interval!r}")
+
+
+def next_start(start: datetime, interval: str = CHAT_LOG_PARTITION_INTERVAL) -> datetime:
+    if interval == "month":
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start + timedelta(days=7 if interval == "week" else 1)
+
+
+def partition_name(start: datetime, interval: str = CHAT_LOG_PARTITION_INTERVAL) -> str:
+    if interval == "month":
+        return f"{PARTITION_PREFIX}{start:%Y_%m}"
+    return f"{PARTITION_PREFIX}{start:%Y_%m_%d}"
+
+
+def parse_bound(value: str) -> datetime:
+    # pg_get_expr renders e.g. '2026-10-01 00:00:00+00'
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"
+    return datetime.fromisoformat(value)
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    result = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name AND relkind IN ('r', 'p')"),
+        {"name": PARENT_TABLE},
+    )
+    return result.scalar() == "p"
+
+
+async def list_partitions(conn: AsyncConnection) -> List[Tuple[str, datetime, datetime]]:
+    result = await conn.execute(text("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :name
+    """), {"name": PARENT_TABLE})
+    partitions = []
+    for name, bound in result.all():
+        match = re.search(r"FROM \('([^']+)'\) TO \('([^']+)'\)", bound or "")
+        if match:
+            partitions.append((name, parse_bound(match.group(1)), parse_bound(match.group(2))))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def ensure_partitions(conn: AsyncConnection, now: Optional[datetime] = None,
+                            since: Optional[datetime] = None) -> List[str]:
+    # Create every partition from `since` (default: now) up to CHAT_LOG_PARTITIONS_AHEAD ahead
+    now = now or datetime.now(timezone.utc)
+    start = partition_start(since or now)
+    last = partition_start(now)
+    for _ in range(CHAT_LOG_PARTITIONS_AHEAD):
+        last = next_start(last)
+
+    existing = {name for name, _, _ in await list_partitions(conn)}
+    created = []
+    while start <= last:
+        end = next_start(start)
+        name = partition_name(start)
+        if name not in existing:
+            await conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            created.append(name)
+        start = end
+    return created
+
+
+async def archive_table(name: str, archive_dir: Path = CHAT_LOG_ARCHIVE_DIR) -> Path:
+    # Written to a temp file and renamed, so a crash never leaves a truncated archive behind
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    target = archive_dir / f"{name}.ndjson.gz"
+    partial = target.with_suffix(".gz.partial")
+    source = table(name, *(column(c) for c in EXPORT_COLUMNS))
+    query = select(*source.columns).order_by(source.c.timestamp, source.c.id)
+    with open(partial, "wb") as out:
+        async for chunk in export_chat_logs("ndjson", compress=True, query=query):
+            out.write(chunk)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(partial, target)
+    return target
+
+
+async def detached_partitions(conn: AsyncConnection) -> List[str]:
+    # Left over when a previous run detached a partition but did not finish archiving it
+    result = await conn.execute(text(
+        "SELECT relname FROM pg_class WHERE relname LIKE :prefix AND relkind = 'r' AND NOT relispartition"
+    ), {"prefix": PARTITION_PREFIX.replace("_", r"\_") + "%"})
+    return [name for name in result.scalars().all()]
+
+
+async def apply_retention(now: Optional[datetime] = None, retention_days: int = CHAT_LOG_RETENTION_DAYS) -> List[str]:
+    """
+    Detach, archive and drop partitions that ended before the retention window.
+
+    Detaching is its own transaction so readers stop seeing the rows at once;
+    the archive is then streamed to CHAT_LOG_ARCHIVE_DIR and only after it is
+    safely on disk is the table dropped. Nothing is ever DELETEd.
+    """
+    if retention_days <= 0:
+        return []
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+
+    async with engine.begin() as conn:
+        for name, _, end in await list_partitions(conn):
+            if end <= cutoff:
+                await conn.execute(text(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION "{name}"'))
+        expired = await detached_partitions(conn)
+
+    archived = []
+    for name in expired:
+        path = await archive_table(name)
+        async with engine.begin() as conn:
+            await conn.execute(text(f'DROP TABLE "{name}"'))
+        print(f"Archived {name} to {path}")
+        archived.append(name)
+    return archived
+
+
+async def prune_session_hours(now: Optional[datetime] = None) -> int:
+    # Not tied to partitioning: the table gains a row per session per hour on every backend
+    cutoff = (now or datetime.now(timezone.utc)) - SESSION_HOURS_RETENTION
+    async with engine.begin() as conn:
+        result = await conn.execute(delete(ChatSessionHour).where(ChatSessionHour.hour < cutoff))
+    return result.rowcount
+
+
+async def maintain_partitions(now: Optional[datetime] = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    async with engine.connect() as lock_conn:
+        # Session-level advisory lock: other workers skip this run
+        got_lock = (await lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:id)"), {"id": MAINTENANCE_LOCK_ID}
+        )).scalar()
+        await lock_conn.commit()
+        if not got_lock:
+            return {"skipped": True}
+        try:
+            async with engine.begin() as conn:
+                if not await is_partitioned(conn):
+                    print("chat_logs is not partitioned yet; run `python manage_partitions.py convert`.")
+                    return {"skipped": True}
+                created = await ensure_partitions(conn, now)
+            archived = await apply_retention(now)
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MAINTENANCE_LOCK_ID})
+            await lock_conn.commit()
+    return {"created": created, "archived": archived}
+
+
+async def convert_to_partitioned():
+    """
+    One-off migration of a plain chat_logs table into the partitioned layout.
+
+    The old table and its index/sequence names are moved aside, the
+    partitioned table is created, partitions covering every existing row are
+    added and the rows copied over, all in one transaction.
+    """
+    from app.database import Base
+
+    async with engine.begin() as conn:
+        if await is_partitioned(conn):
+            print("chat_logs is already partitioned.")
+            return
+        for statement in (
+            "ALTER TABLE chat_logs RENAME TO chat_logs_legacy",
+            "ALTER INDEX IF EXISTS chat_logs_pkey RENAME TO chat_logs_legacy_pkey",
+            "ALTER INDEX IF EXISTS ix_chat_logs_id RENAME TO ix_chat_logs_legacy_id",
+            "ALTER INDEX IF EXISTS ix_chat_logs_session_id RENAME TO ix_chat_logs_legacy_session_id",
+            "ALTER SEQUENCE IF EXISTS chat_logs_id_seq RENAME TO chat_logs_legacy_id_seq",
+            "ALTER TABLE chat_logs_legacy ADD COLUMN IF NOT EXISTS topic VARCHAR",
+            "UPDATE chat_logs_legacy SET timestamp = now() WHERE timestamp IS NULL",
+        ):
+            await conn.execute(text(statement))
+        await conn.run_sync(Base.metadata.create_all)
+
+        oldest = (await conn.execute(text("SELECT min(timestamp) FROM chat_logs_legacy"))).scalar()
+        await ensure_partitions(conn, since=oldest)
+        columns = ", ".join(f'"{c}"' for c in EXPORT_COLUMNS)
+        result = await conn.execute(text(
+            f"INSERT INTO chat_logs ({columns}) SELECT {columns} FROM chat_logs_legacy"
+        ))
+        await conn.execute(text(
+            "SELECT setval(pg_get_serial_sequence('chat_logs', 'id'), "
+            "(SELECT COALESCE(max(id), 0) + 1 FROM chat_logs), false)"
+        ))
+        await conn.execute(text("DROP TABLE chat_logs_legacy"))
+    print(f"Converted chat_logs to partitions ({result.rowcount} rows copied).")
+
+
+class PartitionMaintainer:
+    # Runs prune_session_hours (any backend) and maintain_partitions (Postgres)
+    # every CHAT_LOG_MAINTENANCE_INTERVAL seconds in the background
+
+    def __init__(self, interval: float = CHAT_LOG_MAINTENANCE_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        # Make sure the current partition exists before the first chat log is written
+        await self.run_once()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def run_once(self):
+        if engine.dialect.name == "postgresql":
+            try:
+                await maintain_partitions()
+            except Exception as e:
+                print(f"Chat log partition maintenance failed: {e}")
+        try:
+            await prune_session_hours()
+        except Exception as e:
+            print(f"Pruning chat_session_hours failed: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+
+partition_maintainer = PartitionMaintainer()
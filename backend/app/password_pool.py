@@ -0,0 +1,71 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from app.metrics import CallbackMetric
+
+# Threads that may run bcrypt at once (bcrypt releases the GIL while hashing)
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", "2"))
+# Running + queued hashes allowed before new callers are turned away
+HASH_POOL_MAX_PENDING = int(os.getenv("HASH_POOL_MAX_PENDING", "8"))
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class HashingPool:
+    """
+    Runs password hashing off the event loop with a cap on outstanding work.
+
+    Beyond `max_pending` calls `run` raises PoolSaturated immediately instead
+    of queueing, so a login burst cannot pile up seconds of bcrypt work.
+    """
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, max_pending: int = HASH_POOL_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.workers)
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturated()
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": min(self.pending, self.workers),
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+hashing_pool = HashingPool()
+
+CallbackMetric(
+    "password_hash_pool", "Password hashing pool state",
+    lambda: [({"stat": stat}, value) for stat, value in hashing_pool.stats().items()],
+    labels=("stat",)
+)
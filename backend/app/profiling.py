@@ -0,0 +1,204 @@
+import contextvars
+import hashlib
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+from app.auth import SECRET_KEY
+
+# Fraction of requests profiled without being asked (0 disables)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Profiles kept in memory for download
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+# Seconds between stack samples
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_HEADER = b"x-profile"
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+# The profile of the request being served, for counting its SQL statements
+current_profile: contextvars.ContextVar = contextvars.ContextVar("current_profile", default=None)
+
+
+def sign_profile_token(ttl: int = 300) -> str:
+    expires = str(int(time.time()) + ttl)
+    signature = hmac.new(SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_token(token: str) -> bool:
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(SECRET_KEY.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread from a background thread.
+
+    Run against the event loop thread it shows where the loop spends its
+    time while the request is in flight, including time spent on other
+    coroutines that were scheduled in between. Each stack is weighted by
+    the wall time since the previous sample, since CPU-bound code holding
+    the GIL delays samples past `interval`.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()  # stack -> seconds
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += now - last
+                self.samples += 1
+            last = now
+
+
+class RequestProfile:
+    _ids = itertools.count(1)
+
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = next(self._ids)
+        self.method = method
+        self.path = path
+        self.route = path
+        self.reason = reason
+        self.status = None
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()  # stack -> seconds
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route,
+            "path": self.path,
+            "status": self.status,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_time * 1000, 3),
+            "samples": self.samples,
+        }
+
+    def collapsed(self) -> str:
+        # Brendan Gregg's folded format: "root;child;leaf weight", one stack per line, weights in microseconds
+        return "".join(
+            ";".join(f"{name} ({os.path.basename(file)}:{line})" for name, file, line in stack)
+            + f" {round(seconds * 1_000_000)}\n"
+            for stack, seconds in self.stacks.most_common()
+        )
+
+    def speedscope(self) -> dict:
+        frames: List[dict] = []
+        index: Dict[Frame, int] = {}
+        samples, weights = [], []
+        for stack, seconds in self.stacks.items():
+            row = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                row.append(index[frame])
+            samples.append(row)
+            weights.append(seconds)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.method} {self.route}",
+            "exporter": "smart-promo-api",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{self.method} {self.path} ({self.duration * 1000:.1f} ms, {self.sql_count} SQL)",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+recent_profiles: "deque[RequestProfile]" = deque(maxlen=PROFILE_KEEP)
+
+
+def get_profile(profile_id: int) -> Optional[RequestProfile]:
+    return next((p for p in recent_profiles if p.id == profile_id), None)
+
+
+class ProfilingMiddleware:
+    # Costs one header lookup (plus a random() call when sampling) for requests that are not profiled
+
+    def __init__(self, app):
+        self.app = app
+
+    def profile_reason(self, scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return "header" if verify_profile_token(value.decode("latin-1")) else None
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        reason = self.profile_reason(scope)
+        if reason is None:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope["method"], scope["path"], reason)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident())
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            profile.duration = time.perf_counter() - started
+            current_profile.reset(token)
+            profile.stacks = sampler.stacks
+            profile.samples = sampler.samples
+            route = scope.get("route")
+            profile.route = getattr(route, "path", scope["path"])
+            recent_profiles.append(profile)
@@ -1,192 +1,257 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import Text, bindparam, func, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.database import get_db
+from app.database import IS_SQLITE, get_db
+from app.migrations import schema_gate
+from app.json_patch import JsonPatchConflict, JsonPatchError, apply_patch, replace_paths, validate_patch
 from app.models import Section
+from app.section_store import content_digest, upsert_sections
 from app.schemas import SectionUpdate, SectionResponse
+from app.content_cache import section_cache
+from app.content_bundle import publish_from_database
+from app.chat_analytics import chat_dashboard
+from app.chat_export import EXPORT_FORMATS, export_chat_logs
+from app.profiling import PROFILE_HEADER, get_profile, recent_profiles, sign_profile_token
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
 
-router = APIRouter()
+def require_schema():
+    # Writes wait for the boot-time migration, which is retried while the database is down
+    if not schema_gate.ready:
+        raise HTTPException(status_code=503, detail="Database is not available yet; retry shortly", headers={"Retry-After": "5"})
+
+router = APIRouter(dependencies=[Depends(require_schema)])
 
 from app.auth import get_current_user
 from app.models import User
 
+async def publish_content():
+    # After commit: reload this worker's cache and republish the static content bundle
+    await publish_from_database()
+
+def version_etag(version: int) -> str:
+    return f'"{version}"'
+
+def parse_if_match(if_match: Optional[str]) -> Optional[Set[int]]:
+    # If-Match carries section versions as ETags ("3", W/"3" or a list); None / "*" means no precondition
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip().removeprefix("W/").strip('"')
+        if not tag.isdigit():
+            raise HTTPException(status_code=400, detail='If-Match must list section versions, e.g. "3"')
+        versions.add(int(tag))
+    return versions
+
+def check_version(section: Section, expected: Optional[Set[int]]):
+    if expected is not None and section.version not in expected:
+        raise HTTPException(
+            status_code=412,
+            detail="Section was changed by someone else; reload it and try again",
+            headers={"ETag": version_etag(section.version)}
+        )
+
 @router.put("/content/{key}", response_model=SectionResponse)
-async def update_content(key: str, section_update: SectionUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    result = await db.execute(select(Section).where(Section.key == key))
+async def update_content(key: str, section_update: SectionUpdate, response: Response, if_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    expected = parse_if_match(if_match)
+    result = await db.execute(select(Section).where(Section.key == key).with_for_update())
     section = result.scalars().first()
     
     if not section:
+        if expected is not None:
+            raise HTTPException(status_code=412, detail="Section does not exist")
         # Create if not exists (upsert-ish behavior for admin convenience)
-        section = Section(key=key, content=section_update.content)
+        section = Section(key=key, content=section_update.content, version=1)
         db.add(section)
     else:
+        check_version(section, expected)
         section.content = section_update.content
+        section.version += 1
+    section.content_hash = content_digest(section_update.content)
     
+    await section_cache.notify_change(db)
     await db.commit()
     await db.refresh(section)
+    await publish_content()
+    response.headers["ETag"] = version_etag(section.version)
     return section
 
+@router.put("/content")
+async def bulk_update_content(sections: Dict[str, Dict[str, Any]] = Body(...), db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Publish many sections at once: {"hero": {...}, "pricing": {...}}.
+
+    All keys are written in one transaction with a single upsert, so readers
+    never see a half-applied page. Sections whose content is unchanged are skipped.
+    """
+    changes = await upsert_sections(db, sections)
+    if changes["created"] or changes["updated"]:
+        await section_cache.notify_change(db)
+        await db.commit()
+        await publish_content()
+    return changes
+
+async def patch_in_database(db: AsyncSession, key: str, paths: list, expected: Optional[Set[int]]):
+    """
+    Apply replace-only patches with nested jsonb_set calls, without reading the document.
+
+    Returns (version, last_updated), or None when nothing was updated (missing
+    section or path, version mismatch, type error) so the caller can fall back
+    to the Python path and report the precise error.
+    """
+    content = Section.content
+    conditions = [Section.key == key]
+    for tokens, value in paths:
+        path = bindparam(None, tokens, type_=ARRAY(Text))
+        # jsonb_set would silently create or skip a missing target; RFC 6902 requires it to exist
+        conditions.append(Section.content.op("#>")(path).isnot(None))
+        content = func.jsonb_set(content, path, bindparam(None, value, type_=JSONB), False, type_=JSONB)
+    if expected is not None:
+        conditions.append(Section.version.in_(expected))
+    stmt = (
+        update(Section)
+        .where(*conditions)
+        # The new content is never loaded here, so its digest is unknown until the next full write
+        .values(content=content, content_hash=None, version=Section.version + 1, last_updated=func.now())
+        .returning(Section.version, Section.last_updated)
+        .execution_options(synchronize_session=False)
+    )
+    try:
+        async with db.begin_nested():
+            return (await db.execute(stmt)).first()
+    except DBAPIError:
+        # e.g. a non-numeric token addressing an array element
+        return None
+
+async def patch_in_python(db: AsyncSession, key: str, patch: List[dict], expected: Optional[Set[int]]):
+    result = await db.execute(select(Section).where(Section.key == key).with_for_update())
+    section = result.scalars().first()
+    if not section:
+        raise HTTPException(status_code=404, detail="Section not found")
+    check_version(section, expected)
+    try:
+        content = apply_patch(section.content, patch)
+    except JsonPatchConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # Same shape SectionUpdate enforces for PUT; a root "replace" / "add" could make it anything
+    if not isinstance(content, dict):
+        raise HTTPException(status_code=422, detail="Patched section content must be a JSON object")
+    section.content = content
+    section.content_hash = content_digest(section.content)
+    section.version += 1
+    await db.flush()
+    await db.refresh(section, ["last_updated"])
+    return section.version, section.last_updated
+
+@router.patch("/content/{key}")
+async def patch_content(key: str, patch: List[dict] = Body(...), if_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Apply an RFC 6902 JSON Patch (application/json-patch+json) to one section.
+
+    Send the section's version as `If-Match: "<version>"` to get a 412 instead
+    of overwriting someone else's edit. Replace-only patches are applied in SQL
+    with jsonb_set on Postgres; anything else is applied in Python under a row lock.
+    """
+    expected = parse_if_match(if_match)
+    try:
+        validate_patch(patch)
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    row = None
+    paths = replace_paths(patch)
+    if paths and not IS_SQLITE:
+        row = await patch_in_database(db, key, paths, expected)
+    if row is None:
+        row = await patch_in_python(db, key, patch, expected)
+    version, last_updated = row
+
+    await section_cache.notify_change(db)
+    await db.commit()
+    await publish_content()
+    # Only the new version goes back; the client already has the content it patched
+    return JSONResponse(
+        {"key": key, "version": version, "last_updated": last_updated.isoformat()},
+        headers={"ETag": version_etag(version)}
+    )
+
+@router.get("/analytics/chat")
+async def chat_analytics(hours: int = Query(24, ge=1, le=24 * 90), db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Served from the hourly rollups, never from chat_logs
+    return await chat_dashboard(db, hours)
+
+@router.get("/chat-logs/export")
+async def export_chat_log_rows(
+    format: str = "ndjson",
+    gzip: bool = False,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    session_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+    # Streams from a server-side cursor; nothing is buffered beyond one batch
+    filename = f"chat_logs.{format}"
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        export_chat_logs(format, compress=gzip, start=start, end=end, session_id=session_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/profiles/token")
+async def create_profile_token(ttl: int = Query(300, ge=1, le=3600), current_user: User = Depends(get_current_user)):
+    # Send the returned value as the X-Profile header on the request to profile
+    return {"header": PROFILE_HEADER.decode(), "value": sign_profile_token(ttl), "expires_in": ttl}
+
+@router.get("/profiles")
+async def list_profiles(current_user: User = Depends(get_current_user)):
+    return [profile.summary() for profile in reversed(recent_profiles)]
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: int, format: str = "speedscope", current_user: User = Depends(get_current_user)):
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (only the most recent are kept)")
+    if format == "collapsed":
+        # Input for flamegraph.pl / inferno; speedscope also imports it
+        return PlainTextResponse(
+            profile.collapsed(),
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'}
+        )
+    if format != "speedscope":
+        raise HTTPException(status_code=400, detail="format must be one of speedscope, collapsed")
+    return JSONResponse(
+        profile.speedscope(),
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.speedscope.json"'}
+    )
+
 # --- Seeding Logic for Production ---
-from app.auth import get_password_hash
-
-initial_data = {
-    "hero": {
-        "slides": [
-            {
-                "title": "The Native AI Growth Engine for Shopify",
-                "subtitle": "Seamlessly integrates with your Shopify store to automate promotions and boost retention.",
-                "cta_primary": "Install Shopify App",
-                "cta_primary_url": "#",
-                "cta_secondary": "View Demo Store",
-                "cta_secondary_url": "#",
-                "style": "gradient-indigo",
-                "image_url": "" 
-            },
-            {
-                "title": "Turn Shopify Visitors into Customers",
-                "subtitle": "Smart popups that sync with your Shopify inventory and customer tags.",
-                "cta_primary": "Start Free Trial",
-                "cta_primary_url": "#",
-                "cta_secondary": "Explore Features",
-                "cta_secondary_url": "#",
-                "style": "dark-mode",
-                "image_url": "https://images.unsplash.com/photo-1556742049-0cfed4f7a07d?auto=format&fit=crop&q=80&w=1000"
-            },
-            {
-                "title": "Deep Sync with Shopify Data",
-                "subtitle": "Analyze 12 months of Shopify Order history to predict your next bestseller.",
-                "cta_primary": "Connect Store",
-                "cta_primary_url": "#",
-                "cta_secondary": "Read Case Study",
-                "cta_secondary_url": "#",
-                "style": "light-mode",
-                "image_url": ""
-            }
-        ]
-    },
-    "features": {
-        "title": "Built Exclusively for Shopify Plus",
-        "items": [
-            {"title": "Shopify Flow Integration", "desc": "Trigger advanced automation directly from your Shopify Admin Flow.", "icon": "Zap"},
-            {"title": "Sync Orders & Customers", "desc": "Real-time bi-directional sync with your Shopify customer database.", "icon": "Users"},
-            {"title": "Smart Discount Codes", "desc": "Auto-generate unique Shopify discount codes based on user behavior.", "icon": "Tag"},
-            {"title": "Theme App Extension", "desc": "Works with Online Store 2.0 themes without slowing down your site.", "icon": "Layout"},
-            {"title": "POS Compatibility", "desc": "Capture emails in-store and sync them to your online marketing lists.", "icon": "Smartphone"},
-            {"title": "Multi-Currency Support", "desc": "Native support for Shopify Markets and international currencies.", "icon": "Globe"}
-        ]
-    },
-    "how_it_works": {
-        "title": "Launch in 3 Simple Steps",
-        "steps": [
-            {"step": 1, "title": "Install from App Store", "desc": "Find 'Smart Promo' on the official Shopify App Store and click Install."},
-            {"step": 2, "title": "One-Click OAuth", "desc": "Securely authorize access to your store via Shopify's official API."},
-            {"step": 3, "title": "Watch Sales Grow", "desc": "We instantly analyze your past orders and deploy optimized campaigns."}
-        ]
-    },
-    "testimonials": {
-        "title": "Trusted by 5,000+ Shopify Merchants",
-        "items": [
-            {"name": "Sarah Jenkins", "role": "Owner, EcoWear", "quote": "The best Shopify app we've installed this year. ROI was positive in day 3.", "avatar": "https://i.pravatar.cc/150?u=a042581f4e29026024d"},
-            {"name": "David Chen", "role": "CTO, TechGear", "quote": "Finally, an AI tool that actually respects Shopify's API rate limits. Rock solid.", "avatar": "https://i.pravatar.cc/150?u=a042581f4e29026704d"},
-            {"name": "Elena Rodriguez", "role": "Marketing VP, GlowUp", "quote": "Syncs perfectly with our theme. No liquid code changes needed!", "avatar": "https://i.pravatar.cc/150?u=a042581f4e29026703d"}
-        ]
-    },
-    "pricing": {
-        "title": "Simple Plans for Every Stage",
-        "subtitle": "Choose the perfect plan for your Shopify store size. Upgrade or downgrade anytime.",
-        "plans": [
-            {
-                "name": "Starter",
-                "price": "$29",
-                "period": "mo",
-                "description": "Perfect for essential sales automation and basic insights.",
-                "features": ["Up to 500 Orders/mo", "Basic Cohort Analysis", "1 Automated Campaign", "Email Support"],
-                "cta": "Start Free Trial",
-                "cta_url": "#",
-                "highlight": False
-            },
-            {
-                "name": "Growth",
-                "price": "$79",
-                "period": "mo",
-                "description": "Advanced tools for scaling brands with serious revenue goals.",
-                "features": ["Up to 2,500 Orders/mo", "Predictive Analytics", "Unlimited Campaigns", "Chatbot Assistant", "Priority Support"],
-                "cta": "Start Free Trial",
-                "cta_url": "#",
-                "highlight": True
-            },
-            {
-                "name": "Scale",
-                "price": "$299",
-                "period": "mo",
-                "description": "Enterprise-grade power for high-volume Shopify Plus merchants.",
-                "features": ["Unlimited Orders", "Custom AI Models", "Dedicated Success Manager", "Shopify Flow Actions", "API Access"],
-                "cta": "Contact Sales",
-                "cta_url": "#",
-                "highlight": False
-            }
-        ]
-    },
-    "cta_bottom": {
-        "title": "Ready to scale your Shopify brand?",
-        "subtitle": "Join the fastest growing merchants on the Shopify platform.",
-        "cta_main": "Install on Shopify",
-        "cta_main_url": "#",
-        "cta_sub": "14-day free trial • Cancel anytime"
-    },
-    "seo": {
-        "title": "Smart Promo - #1 AI App for Shopify",
-        "description": "Boost sales with AI-powered promotions. The highest rated growth app on the Shopify App Store."
-    },
-    "shopify_integration": {
-        "title": "Deeply Integrated with Shopify",
-        "subtitle": "We don't just sit on top of your store. We are woven into the fabric of the Shopify ecosystem.",
-        "features": [
-            {
-                "title": "Shopify Flow", 
-                "desc": "Trigger Smart Promo campaigns directly from Shopify Flow workflows. No coding required.", 
-                "icon": "Workflow"
-            },
-            {
-                "title": "Checkout Extensibility", 
-                "desc": "Native checkout upsells that look and feel exactly like your brand's checkout experience.", 
-                "icon": "CreditCard"
-            },
-            {
-                "title": "Hydrogen Ready", 
-                "desc": "Headless storefront? No problem. Our React components are 100% compatible with Hydrogen.", 
-                "icon": "Code"
-            },
-            {
-                "title": "Shopify Markets", 
-                "desc": "Automatically adjust currency and language for your international customers.", 
-                "icon": "Globe"
-            }
-        ]
-    }
-}
+from app.password_pool import PoolSaturated
+from app import seeding
 
 @router.post("/seed")
 async def seed_database(db: AsyncSession = Depends(get_db)):
-    # 1. Seed Content
-    for key, content in initial_data.items():
-        result = await db.execute(select(Section).where(Section.key == key))
-        existing = result.scalars().first()
-        if not existing:
-            db.add(Section(key=key, content=content))
-        else:
-            # Optional: Overwrite existing on re-seed? Let's just update to be safe
-            existing.content = content
-    
-    # 2. Seed Admin User
-    result = await db.execute(select(User).where(User.username == "admin"))
-    user = result.scalars().first()
-    if not user:
-        admin_user = User(
-            username="admin", 
-            hashed_password=get_password_hash("admin123")
-        )
-        db.add(admin_user)
-            
+    try:
+        changes = await seeding.seed_database(db)
+    except PoolSaturated:
+        raise HTTPException(status_code=429, detail="Password hashing is busy. Please retry shortly.")
+
+    if changes["created"] or changes["updated"]:
+        await section_cache.notify_change(db)
     await db.commit()
-    return {"message": "Database seeded successfully"}
+    if changes["created"] or changes["updated"]:
+        await publish_content()
+    return {"message": "Database seeded successfully", **changes}
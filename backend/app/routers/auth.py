@@ -4,19 +4,46 @@ from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import AsyncSessionLocal
 from app.models import User
-from app.auth import verify_password, create_access_token, get_db
+from app.auth import verify_password_async, create_access_token, get_db, get_current_user
+from app.password_pool import PoolSaturated, hashing_pool
 from datetime import timedelta
+from app.metrics import Histogram
+from collections import deque
+import time
 
 router = APIRouter(
     tags=["auth"]
 )
 
+# Recent login durations in milliseconds (successful and failed)
+login_timings = deque(maxlen=1000)
+LOGIN_DURATION = Histogram("auth_login_duration_seconds", "Login latency including password verification")
+
 @router.post("/token")
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    started = time.perf_counter()
+    try:
+        return await authenticate(form_data, db)
+    finally:
+        elapsed = time.perf_counter() - started
+        login_timings.append(elapsed * 1000)
+        LOGIN_DURATION.observe(elapsed)
+
+async def authenticate(form_data: OAuth2PasswordRequestForm, db: AsyncSession):
     result = await db.execute(select(User).where(User.username == form_data.username))
     user = result.scalars().first()
+
+    try:
+        valid = bool(user) and await verify_password_async(form_data.password, user.hashed_password)
+    except PoolSaturated:
+        # Fail fast rather than queue more bcrypt work behind a burst
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts in progress. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -28,3 +55,13 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/stats")
+async def auth_stats(current_user: User = Depends(get_current_user)):
+    ordered = sorted(login_timings)
+    def pct(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3) if ordered else None
+    return {
+        "login_ms": {"samples": len(ordered), "p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)},
+        "hash_pool": hashing_pool.stats(),
+    }
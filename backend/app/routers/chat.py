@@ -1,8 +1,19 @@
+import json
+import os
+import re
+import time
+from collections import deque
 from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import get_db
-from app.models import ChatLog
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.auth import get_current_user
+from app.models import User
+from app.chat_log_writer import chat_log_writer
 from app.schemas import ChatMessage, ChatResponse
+from app.chat_matcher import KeywordMatcher, TOKEN_RE
+from app.ttl_cache import TTLCache
+from app.metrics import CallbackMetric, Histogram
+from app.chat_retrieval import RetrievalEngine
 
 router = APIRouter()
 
@@ -90,46 +101,171 @@ KEYWORD_MAP = {
     # Details
     "domain": "domains", "url": "domains", "website": "domains",
     "analytic": "analytics", "report": "analytics", "data": "analytics", "conversion": "analytics",
-    "refund": "refunds", "return": "refunds", "cancel": "refunds"
+    "refund": "refunds", "return": "refunds", "cancel": "refunds",
+
+    # Inflections that whole-word matching no longer catches by substring
+    "installation": "install", "pricing": "pricing"
 }
 
-@router.post("/message", response_model=ChatResponse)
-async def chat_message(chat_msg: ChatMessage, db: AsyncSession = Depends(get_db)):
-    user_msg = chat_msg.message.lower()
-    
-    response_text = ""
-    
-    # 1. Smart Keyword Matching
-    matched_topic = None
-    
-    # Scan for keywords
-    for keyword, topic in KEYWORD_MAP.items():
-        if keyword in user_msg:
-            # We found a keyword!
-            matched_topic = topic
-            break # Return the first valid match
+# 3. Conversational Fallbacks (used when no topic matches)
+SMALL_TALK = {
+    "hello": "greeting", "hi": "greeting", "hey": "greeting",
+    "thank": "thanks", "thx": "thanks",
+    "bye": "goodbye", "goodbye": "goodbye"
+}
+
+SMALL_TALK_RESPONSES = {
+    "greeting": "Hello! 👋\n\nI am your **Shopify Knowledge Expert**.\n\nAsk me about:\n* Marketing & Sales\n* SEO & Speed\n* Shipping & Payments\n* Our App Features",
+    "thanks": "You're welcome! Let me know if you need anything else to grow your business. 🚀",
+    "goodbye": "Goodbye! Good luck with your sales! 💸"
+}
+
+FALLBACK_RESPONSE = "That's a great question. 🤔\n\nI'm constantly learning. While I don't have a specific answer for that yet, I'd recommend checking the **Shopify Help Center** or asking about **marketing**, **sales**, or **setup**."
+
+# Built once at import: BM25 index over answers + synonyms, whole-word small talk lookup
+knowledge_base = RetrievalEngine(TOPICS, KEYWORD_MAP)
+small_talk_matcher = KeywordMatcher(SMALL_TALK)
+
+# Replies for recently asked questions, keyed on the normalized message
+response_cache = TTLCache(
+    maxsize=int(os.getenv("CHAT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("CHAT_CACHE_TTL", "3600"))
+)
+
+CallbackMetric(
+    "chat_response_cache_events_total", "Chat reply cache lookups and removals",
+    lambda: [({"event": e}, getattr(response_cache, e)) for e in ("hits", "misses", "evictions", "expirations")],
+    labels=("event",), kind="counter"
+)
+CallbackMetric("chat_response_cache_entries", "Replies currently cached", lambda: [({}, len(response_cache))])
+
+def normalize_message(message: str) -> str:
+    # Fold case, punctuation and whitespace: "Pricing??" == "pricing"
+    return " ".join(TOKEN_RE.findall(message.lower()))
+
+def reload_knowledge_base():
+    # Call after TOPICS / KEYWORD_MAP / SMALL_TALK change at runtime
+    global knowledge_base, small_talk_matcher
+    knowledge_base = RetrievalEngine(TOPICS, KEYWORD_MAP)
+    small_talk_matcher = KeywordMatcher(SMALL_TALK)
+    response_cache.clear()
+
+def generate_response(user_msg: str):
+    # Returns (reply, topic); topic is None when the generic fallback is used
+    # 1. Rank topics (best match, plus a close runner-up)
+    matched_topics = knowledge_base.answer_topics(user_msg)
             
     # 2. Generate Response
-    if matched_topic and matched_topic in TOPICS:
-        response_text = TOPICS[matched_topic]
-    else:
-        # Fallback / Conversational Logic
-        if "hello" in user_msg or "hi" in user_msg or "hey" in user_msg:
-            response_text = "Hello! 👋\n\nI am your **Shopify Knowledge Expert**.\n\nAsk me about:\n* Marketing & Sales\n* SEO & Speed\n* Shipping & Payments\n* Our App Features"
-        elif "thank" in user_msg:
-            response_text = "You're welcome! Let me know if you need anything else to grow your business. 🚀"
-        elif "bye" in user_msg:
-             response_text = "Goodbye! Good luck with your sales! 💸"
-        else:
-            response_text = "That's a great question. 🤔\n\nI'm constantly learning. While I don't have a specific answer for that yet, I'd recommend checking the **Shopify Help Center** or asking about **marketing**, **sales**, or **setup**."
+    if matched_topics:
+        reply = "\n\n---\n\n".join(TOPICS[hit.topic] for hit in matched_topics)
+        return reply, matched_topics[0].topic
+
+    # Fallback / Conversational Logic
+    small_talk = small_talk_matcher.first(user_msg)
+    if small_talk:
+        return SMALL_TALK_RESPONSES[small_talk.value], small_talk.value
+    return FALLBACK_RESPONSE, None
+
+def cached_response(message: str):
+    key = normalize_message(message)
+    cached = response_cache.get(key)
+    if cached is None:
+        cached = generate_response(key)
+        response_cache.set(key, cached)
+    return cached
+
+@router.post("/message", response_model=ChatResponse)
+async def chat_message(chat_msg: ChatMessage):
+    response_text, topic = cached_response(chat_msg.message)
             
-    # Save to DB
-    log = ChatLog(
+    # Queue for the background writer; the reply never waits on a commit
+    await chat_log_writer.submit(
         session_id=chat_msg.session_id,
         user_message=chat_msg.message,
-        bot_response=response_text
+        bot_response=response_text,
+        topic=topic
     )
-    db.add(log)
-    await db.commit()
     
     return ChatResponse(response=response_text)
+
+# --- Streaming (Server-Sent Events) ---
+
+STREAM_CHUNK_CHARS = int(os.getenv("CHAT_STREAM_CHUNK_CHARS", "48"))
+
+# Recent streaming timings in milliseconds: (time to first byte, total)
+stream_timings = deque(maxlen=1000)
+STREAM_TTFB = Histogram("chat_stream_ttfb_seconds", "Time from request to the first SSE chunk")
+STREAM_DURATION = Histogram("chat_stream_duration_seconds", "Time from request to the end of the SSE stream")
+
+def split_chunks(text: str, size: int = STREAM_CHUNK_CHARS):
+    # Break on whitespace so markdown tokens arrive whole
+    chunk = ""
+    for piece in re.findall(r"\s*\S+", text):
+        if chunk and len(chunk) + len(piece) > size:
+            yield chunk
+            chunk = ""
+        chunk += piece
+    if chunk:
+        yield chunk
+
+def sse_event(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/message/stream")
+async def chat_message_stream(chat_msg: ChatMessage):
+    started = time.perf_counter()
+    response_text, topic = cached_response(chat_msg.message)
+
+    async def events():
+        first_byte_ms = None
+        for chunk in split_chunks(response_text):
+            if first_byte_ms is None:
+                first_byte_ms = (time.perf_counter() - started) * 1000
+            yield sse_event({"delta": chunk})
+        total_ms = (time.perf_counter() - started) * 1000
+        stream_timings.append((first_byte_ms or total_ms, total_ms))
+        STREAM_TTFB.observe((first_byte_ms or total_ms) / 1000)
+        STREAM_DURATION.observe(total_ms / 1000)
+        yield sse_event({"ttfb_ms": round(first_byte_ms or total_ms, 3), "total_ms": round(total_ms, 3)}, event="done")
+
+    # The log row is queued only after the last event has been sent
+    log_task = BackgroundTask(
+        chat_log_writer.submit,
+        session_id=chat_msg.session_id,
+        user_message=chat_msg.message,
+        bot_response=response_text,
+        topic=topic
+    )
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=log_task
+    )
+
+def percentile(values, fraction: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+@router.get("/stream-stats")
+async def chat_stream_stats(current_user: User = Depends(get_current_user)):
+    ttfb = [first for first, _ in stream_timings]
+    total = [whole for _, whole in stream_timings]
+    return {
+        "samples": len(stream_timings),
+        "ttfb_ms": {"p50": percentile(ttfb, 0.5), "p95": percentile(ttfb, 0.95)},
+        "total_ms": {"p50": percentile(total, 0.5), "p95": percentile(total, 0.95)},
+    }
+
+@router.get("/cache-stats")
+async def chat_cache_stats(current_user: User = Depends(get_current_user)):
+    return response_cache.stats()
+
+@router.post("/reload-knowledge-base")
+async def reload_knowledge(current_user: User = Depends(get_current_user)):
+    # Rebuilds the indexes and drops every cached reply (also useful to flush the cache after a bad answer)
+    reload_knowledge_base()
+    return response_cache.stats()
@@ -0,0 +1,17 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+from app.images import get_variant
+
+router = APIRouter()
+
+@router.get("/{name}")
+async def image_variant(name: str, request: Request, w: Optional[int] = Query(None, ge=1, le=4096)):
+    path = await get_variant(name, w, request.headers.get("accept", ""))
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Names are content hashes, so a given URL + Accept never changes
+    return FileResponse(path, headers={
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Vary": "Accept",
+    })
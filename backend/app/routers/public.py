@@ -1,23 +1,91 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from app.database import get_db
-from app.models import Section
+import asyncio
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from app.content_bundle import bundle_url, read_manifest
+from app.content_cache import section_cache, ContentSnapshot
 from app.schemas import SectionResponse
 from typing import List
 
 router = APIRouter()
 
+ENCODED_ETAG_SUFFIXES = ("-br", "-gzip")
+
+def encoded_etag(etag: str, encoding: str = None) -> str:
+    # Byte-different encodings must not share a strong validator (RFC 9110 8.8.3): "<hash>-br"
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison is what If-None-Match asks for (RFC 9110 13.1.2); any encoding of the
+    # same content matches, since the client is revalidating that content
+    candidates = set()
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        for suffix in ENCODED_ETAG_SUFFIXES:
+            if tag.endswith(f'{suffix}"'):
+                tag = f'{tag[:-len(suffix) - 1]}"'
+        candidates.add(tag)
+    return etag in candidates
+
+def choose_encoding(accept_encoding: str, snapshot: ContentSnapshot):
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            accepted[coding.lower()] = q
+    for coding in ("br", "gzip"):
+        if coding in snapshot.encoded and accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+def snapshot_response(request: Request, snapshot: ContentSnapshot) -> Response:
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), snapshot)
+    headers = {
+        "ETag": encoded_etag(snapshot.etag, encoding),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        **section_cache.staleness_headers(),
+    }
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+
+    body = snapshot.body
+    if encoding:
+        body = snapshot.encoded[encoding]
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @router.get("/content/{key}", response_model=SectionResponse)
-async def get_content(key: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Section).where(Section.key == key))
-    section = result.scalars().first()
+async def get_content(key: str, response: Response):
+    section = await section_cache.get(key)
     if not section:
         raise HTTPException(status_code=404, detail="Section not found")
+    response.headers.update(section_cache.staleness_headers())
     return section
 
 @router.get("/all-content", response_model=List[SectionResponse])
-async def get_all_content(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Section))
-    sections = result.scalars().all()
-    return sections
+async def get_all_content(request: Request):
+    # Pre-serialized bytes; response_model only documents the shape
+    snapshot = await section_cache.get_snapshot()
+    return snapshot_response(request, snapshot)
+
+@router.get("/content-manifest")
+async def get_content_manifest(request: Request):
+    # Points at the current static bundle (see app/content_bundle.py); readers then leave this API
+    manifest = await asyncio.to_thread(read_manifest)
+    if manifest is None:
+        raise HTTPException(status_code=404, detail="No content bundle has been published")
+    return JSONResponse(
+        {**manifest, "url": bundle_url(manifest["bundle"], str(request.base_url))},
+        headers={"Cache-Control": "public, max-age=30", "ETag": f'"{manifest["version"]}"'}
+    )
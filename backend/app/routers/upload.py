@@ -1,14 +1,12 @@
-import shutil
 import os
-from pathlib import Path
 from app.auth import get_current_user
 from app.models import User
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
-import cloudinary
-import cloudinary.uploader
-from dotenv import load_dotenv
-
-load_dotenv()
+from app.storage import (
+    MAX_UPLOAD_BYTES, UPLOAD_CHUNK_SIZE, UnsupportedMediaType, UploadTooLarge,
+    check_content_type, image_extension, save_upload, sniff_image_type, upload_url,
+)
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Request
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
@@ -17,35 +15,63 @@ CLOUDINARY_CLOUD_NAME = os.getenv("CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_API_KEY = os.getenv("CLOUDINARY_API_KEY")
 CLOUDINARY_API_SECRET = os.getenv("CLOUDINARY_API_SECRET")
 
-if CLOUDINARY_CLOUD_NAME and CLOUDINARY_API_KEY and CLOUDINARY_API_SECRET:
-    cloudinary.config( 
-        cloud_name = CLOUDINARY_CLOUD_NAME, 
-        api_key = CLOUDINARY_API_KEY, 
-        api_secret = CLOUDINARY_API_SECRET,
-        secure = True
-    )
-    USE_CLOUDINARY = True
-else:
-    USE_CLOUDINARY = False
-    UPLOAD_DIR = Path("static/uploads")
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+USE_CLOUDINARY = bool(CLOUDINARY_CLOUD_NAME and CLOUDINARY_API_KEY and CLOUDINARY_API_SECRET)
+
+_cloudinary_uploader = None
+
+def cloudinary_uploader():
+    # The SDK is slow to import, so it is loaded on the first upload rather than at boot
+    global _cloudinary_uploader
+    if _cloudinary_uploader is None:
+        import cloudinary
+        import cloudinary.uploader
+        cloudinary.config( 
+            cloud_name = CLOUDINARY_CLOUD_NAME, 
+            api_key = CLOUDINARY_API_KEY, 
+            api_secret = CLOUDINARY_API_SECRET,
+            secure = True
+        )
+        _cloudinary_uploader = cloudinary.uploader
+    return _cloudinary_uploader
+
+# Without Cloudinary: "inline" keeps base64 data: URLs in the section content,
+# "local" stores files under static/uploads and needs a persistent disk there
+UPLOAD_BACKEND = os.getenv("UPLOAD_BACKEND", "inline")
 
+# Body size is capped while it streams in by UploadSizeLimitMiddleware (app/main.py)
 @router.post("/")
-async def upload_file(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+async def upload_file(request: Request, file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
     try:
+        check_content_type(file.content_type)
         if USE_CLOUDINARY:
-            # Upload to Cloudinary
-            result = cloudinary.uploader.upload(file.file, folder="smart_promo_uploads")
+            image_extension(await file.read(UPLOAD_CHUNK_SIZE))  # raises for anything but an image
+            await file.seek(0)
+            # Upload to Cloudinary (blocking SDK import and call, so keep them off the event loop)
+            result = await run_in_threadpool(
+                lambda: cloudinary_uploader().upload(file.file, folder="smart_promo_uploads")
+            )
             return {"url": result.get("secure_url")}
-        else:
+        elif UPLOAD_BACKEND == "inline":
             # Fallback: Base64 Encoding (No external dependency)
             # This allows images to work on Vercel without Cloudinary or persistent storage
             import base64
-            contents = await file.read()
+            contents = await file.read(MAX_UPLOAD_BYTES + 1)
+            if len(contents) > MAX_UPLOAD_BYTES:
+                raise UploadTooLarge()
+            mime_type = sniff_image_type(contents[:UPLOAD_CHUNK_SIZE])
+            if mime_type is None:
+                raise UnsupportedMediaType()
             encoded = base64.b64encode(contents).decode("utf-8")
-            mime_type = file.content_type or "image/png"
             return {"url": f"data:{mime_type};base64,{encoded}"}
-            
+        else:
+            # Local disk, written in chunks and named by content hash
+            name = await save_upload(file)
+            return {"url": upload_url(name, str(request.base_url))}
+
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes")
+    except UnsupportedMediaType:
+        raise HTTPException(status_code=415, detail="Only PNG, JPEG, GIF, WebP and AVIF images are accepted")
     except Exception as e:
         print(f"Upload Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
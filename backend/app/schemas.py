@@ -14,6 +14,7 @@ class SectionUpdate(SectionBase):
 class SectionResponse(SectionBase):
     key: str
     last_updated: datetime
+    version: int = 1
 
     class Config:
         orm_mode = True
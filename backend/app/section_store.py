@@ -0,0 +1,51 @@
+import hashlib
+import json
+from typing import Any, Dict
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import dialect_insert
+from app.models import Section
+
+
+def content_digest(content: Any) -> str:
+    # Canonical JSON, so key order and whitespace never count as a change
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def upsert_sections(db: AsyncSession, sections: Dict[str, Any]) -> dict:
+    """
+    Write many sections with one INSERT ... ON CONFLICT (key) DO UPDATE.
+
+    Rows whose stored content_hash already matches are left alone (no version
+    bump, no last_updated change). Runs in the caller's transaction; returns
+    the keys that were created, updated or unchanged and the new versions.
+    """
+    if not sections:
+        return {"created": [], "updated": [], "unchanged": [], "versions": {}}
+
+    stmt = dialect_insert(Section).values([
+        {"key": key, "content": content, "content_hash": content_digest(content), "version": 1}
+        for key, content in sections.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Section.key],
+        set_={
+            "content": stmt.excluded.content,
+            "content_hash": stmt.excluded.content_hash,
+            "version": Section.version + 1,
+            "last_updated": func.now(),
+        },
+        # Rows skipped by the WHERE are not returned
+        where=Section.content_hash.is_distinct_from(stmt.excluded.content_hash),
+    ).returning(Section.key, Section.version)
+    written = dict((await db.execute(stmt)).all())
+
+    return {
+        "created": sorted(key for key, version in written.items() if version == 1),
+        "updated": sorted(key for key, version in written.items() if version > 1),
+        "unchanged": sorted(key for key in sections if key not in written),
+        "versions": written,
+    }
@@ -0,0 +1,186 @@
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+
+STATIC_DIR = Path("static")
+UPLOAD_DIR = STATIC_DIR / "uploads"
+# Largest accepted upload in bytes (default 10 MiB)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Multipart framing on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+# The only types accepted, whatever the client claims; anything else could be served back as HTML
+IMAGE_EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/avif": ".avif",
+}
+# Public origin of this API for absolute upload URLs; defaults to the request's base URL
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL")
+# Uploads and content bundles are named by the SHA-256 of their bytes
+CONTENT_ADDRESSED_RE = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+
+
+def ensure_upload_dir():
+    # Created on first write rather than at import, keeping boot free of filesystem work
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+
+class LazyStaticFiles(StaticFiles):
+    # The directory may not exist before the first upload; answer 404 instead of failing
+    async def check_config(self):
+        if os.path.isdir(self.directory):
+            await super().check_config()
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if CONTENT_ADDRESSED_RE.match(os.path.basename(full_path)):
+            # A given name always has the same bytes
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UnsupportedMediaType(Exception):
+    pass
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    # Decided from the leading bytes only; the client's Content-Type is never trusted
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+        return "image/avif"
+    return None
+
+
+def check_content_type(content_type: Optional[str]):
+    # Cheap rejection before reading anything; the bytes are sniffed afterwards regardless
+    if (content_type or "").split(";")[0].strip().lower() not in IMAGE_EXTENSIONS:
+        raise UnsupportedMediaType()
+
+
+def image_extension(head: bytes) -> str:
+    content_type = sniff_image_type(head)
+    if content_type is None:
+        raise UnsupportedMediaType()
+    return IMAGE_EXTENSIONS[content_type]
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rejects upload bodies larger than MAX_UPLOAD_BYTES (plus multipart framing) with 413.
+
+    Bytes are counted as they arrive, before Starlette parses and spools the
+    multipart body, so neither a lying Content-Length nor a chunked request
+    gets past it, whichever upload backend handles the file.
+    """
+
+    def __init__(self, app, path_prefix: str = "/api/upload", max_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.limit = max_bytes + MULTIPART_OVERHEAD
+        self.detail = f"File exceeds {max_bytes} bytes"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.limit:
+            response = JSONResponse({"detail": self.detail}, status_code=413, headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    # Raised inside the route's body parsing, so FastAPI answers it like any HTTPException
+                    raise HTTPException(status_code=413, detail=self.detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def commit_file(temp_path: str, digest: str, ext: str) -> str:
+    # Content-addressed: identical bytes always land on the same name, stored once
+    name = f"{digest}{ext}"
+    target = UPLOAD_DIR / name
+    if target.exists():
+        os.unlink(temp_path)
+    else:
+        os.replace(temp_path, target)
+    return name
+
+
+async def save_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> str:
+    """
+    Copy an upload to UPLOAD_DIR in chunks, named by its SHA-256.
+
+    The size limit is checked as each chunk arrives and the partial file is
+    removed as soon as it is exceeded. The extension comes from the sniffed
+    image type. Returns the stored file name.
+    """
+    head = await file.read(UPLOAD_CHUNK_SIZE)
+    ext = image_extension(head)
+    digest = hashlib.sha256()
+    size = 0
+    await run_in_threadpool(ensure_upload_dir)
+    fd, temp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            chunk = head
+            while True:
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        return await run_in_threadpool(commit_file, temp_path, digest.hexdigest(), ext)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def store_bytes(data: bytes) -> str:
+    # Synchronous counterpart of save_upload for scripts that already hold the bytes
+    ext = image_extension(data[:UPLOAD_CHUNK_SIZE])
+    ensure_upload_dir()
+    fd, temp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-")
+    with os.fdopen(fd, "wb") as out:
+        out.write(data)
+    return commit_file(temp_path, hashlib.sha256(data).hexdigest(), ext)
+
+
+def upload_url(name: str, base_url: Optional[str] = None) -> str:
+    base = (PUBLIC_BASE_URL or base_url or "").rstrip("/")
+    return f"{base}/static/uploads/{name}"
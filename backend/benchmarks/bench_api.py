@@ -0,0 +1,241 @@
+"""
+End-to-end latency and throughput of the HTTP API.
+
+Boots app.main:app in-process (httpx over ASGI, no sockets) against a
+SQLite database in a scratch directory, seeds it with the seeding
+initial_data, synthetic large sections and chat logs, then drives each
+route at a fixed concurrency and reports p50/p95/p99 latency and RPS.
+
+    python -m benchmarks.bench_api --requests 2000 --concurrency 16
+    python -m benchmarks.bench_api --save-baseline benchmarks/baseline.json
+    python -m benchmarks.bench_api --baseline benchmarks/baseline.json
+
+With --baseline, any route whose p95 grew or whose RPS dropped by more
+than --tolerance is reported and the exit status is 1. Absolute numbers
+are only comparable between runs on the same machine. Needs httpx
+(pip install httpx).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+BENCH_USER = "bench-admin"
+BENCH_PASSWORD = "bench-password"
+
+CHAT_MESSAGES = [
+    "hi",
+    "How do I install the app?",
+    "what does pricing look like",
+    "How do I improve my SEO?",
+    "can I get a refund for my subscription",
+    "something completely unrelated",
+]
+
+# 1x1 transparent PNG
+PIXEL_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d4944415478da63f8ffff3f0005fe02fea7d6a4ea0000000049454e44ae426082"
+)
+
+
+def percentile(sorted_values, pct: float) -> float:
+    # Nearest-rank percentile
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def large_section(index: int, kilobytes: int) -> dict:
+    # A landing-page sized section padded out with repeated testimonial-like items
+    item = {"name": f"Customer {index}", "role": "Store owner", "quote": "Great app. " * 20, "image": ""}
+    count = max(1, kilobytes * 1024 // len(json.dumps(item)))
+    return {"title": f"Synthetic section {index}", "items": [dict(item, name=f"Customer {i}") for i in range(count)]}
+
+
+async def seed(args):
+    from sqlalchemy import func, insert
+    from sqlalchemy.future import select
+
+    from app.auth import get_password_hash
+    from app.content_cache import section_cache
+    from app.database import AsyncSessionLocal
+    from app.models import ChatLog, Section, User
+    from app.seeding import initial_data
+
+    async with AsyncSessionLocal() as db:
+        if (await db.execute(select(func.count()).select_from(Section))).scalar():
+            print("Database already seeded, reusing it")
+            return
+
+        sections = dict(initial_data)
+        for i in range(args.large_sections):
+            sections[f"bench_large_{i}"] = large_section(i, args.section_kb)
+        db.add_all([Section(key=key, content=content) for key, content in sections.items()])
+        db.add(User(username=BENCH_USER, hashed_password=get_password_hash(BENCH_PASSWORD)))
+        await db.commit()
+        section_cache.invalidate()
+
+        rng = random.Random(42)
+        now = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        batch_size = 50_000
+        for offset in range(0, args.chat_logs, batch_size):
+            rows = [
+                {
+                    "session_id": f"session-{rng.randrange(args.chat_logs // 5 + 1)}",
+                    "user_message": rng.choice(CHAT_MESSAGES),
+                    "bot_response": "Synthetic reply",
+                    "topic": rng.choice(("install", "pricing", "seo", None)),
+                    "timestamp": now - timedelta(seconds=rng.randrange(90 * 24 * 3600)),
+                }
+                for _ in range(min(batch_size, args.chat_logs - offset))
+            ]
+            await db.execute(insert(ChatLog.__table__), rows)
+            await db.commit()
+        if args.chat_logs:
+            print(f"Seeded {args.chat_logs} chat logs in {time.perf_counter() - started:.1f} s")
+
+
+def scenarios(token: str, keys):
+    auth = {"Authorization": f"Bearer {token}"}
+    return {
+        "public_all_content": lambda client, i: client.get("/api/public/all-content"),
+        "public_content": lambda client, i: client.get(f"/api/public/content/{keys[i % len(keys)]}"),
+        "chat_message": lambda client, i: client.post(
+            "/api/chat/message",
+            json={"session_id": f"bench-{i % 50}", "message": CHAT_MESSAGES[i % len(CHAT_MESSAGES)]},
+        ),
+        "auth_token": lambda client, i: client.post(
+            "/api/auth/token", data={"username": BENCH_USER, "password": BENCH_PASSWORD}
+        ),
+        "admin_content": lambda client, i: client.put(
+            "/api/admin/content/bench_edit", headers=auth, json={"content": {"title": f"Edit {i}"}}
+        ),
+        "upload": lambda client, i: client.post(
+            "/api/upload/", headers=auth, files={"file": ("pixel.png", PIXEL_PNG, "image/png")}
+        ),
+    }
+
+
+async def run_scenario(client, call, requests: int, concurrency: int, warmup: int) -> dict:
+    for i in range(warmup):
+        await call(client, i)
+
+    latencies = []
+    statuses = Counter()
+    next_index = iter(range(requests))
+
+    async def worker():
+        for i in next_index:
+            started = time.perf_counter()
+            response = await call(client, i)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "rps": round(requests / wall, 1),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} ms -> {result['p95_ms']} ms")
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {before['rps']} -> {result['rps']}")
+    return regressions
+
+
+async def main(args) -> int:
+    import httpx
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        await seed(args)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/api/auth/token", data={"username": BENCH_USER, "password": BENCH_PASSWORD})
+            token = response.json()["access_token"]
+            keys = [item["key"] for item in (await client.get("/api/public/all-content")).json()]
+            selected = scenarios(token, keys)
+            names = args.routes or list(selected)
+
+            results = {}
+            print(f"{'route':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'errors':>8}")
+            for name in names:
+                # Logins are bcrypt-bound; a full run of them would dominate the suite
+                requests = args.requests if name != "auth_token" else max(1, args.requests // 20)
+                result = await run_scenario(client, selected[name], requests, args.concurrency, args.warmup)
+                results[name] = result
+                print(f"{name:<20}{result['p50_ms']:>10}{result['p95_ms']:>10}{result['p99_ms']:>10}"
+                      f"{result['rps']:>10}{result['errors']:>8}")
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {args.save_baseline}")
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the API routes in-process.")
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per route")
+    parser.add_argument("--routes", nargs="*", help="Subset of routes to run (default: all)")
+    parser.add_argument("--chat-logs", type=int, default=1_000_000, help="Synthetic chat log rows to seed")
+    parser.add_argument("--large-sections", type=int, default=5)
+    parser.add_argument("--section-kb", type=int, default=256, help="Approximate size of each large section")
+    parser.add_argument("--workdir", help="Directory for the database and uploads (default: a new temp dir)")
+    parser.add_argument("--database-url", help="Override the SQLite database in --workdir")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", help="Write results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    if args.baseline:
+        args.baseline = os.path.abspath(args.baseline)
+    if args.save_baseline:
+        args.save_baseline = os.path.abspath(args.save_baseline)
+    # The app reads its configuration at import time, so set it up before importing anything from it
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="smartpromo-bench-")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    sys.path.insert(0, os.getcwd())
+    os.chdir(workdir)  # uploads land in <workdir>/static/uploads
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{workdir / 'bench.db'}"
+    os.environ["CLOUDINARY_CLOUD_NAME"] = ""
+    os.environ["UPLOAD_BACKEND"] = "local"
+    print(f"Working directory: {workdir}")
+
+    sys.exit(asyncio.run(main(args)))
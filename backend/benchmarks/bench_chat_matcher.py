@@ -0,0 +1,65 @@
+"""
+Micro-benchmark: compiled KeywordMatcher vs. the original substring loop.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_chat_matcher
+"""
+import timeit
+
+from app.chat_matcher import KeywordMatcher
+from app.routers.chat import KEYWORD_MAP
+
+MESSAGES = {
+    "short (5 words)": "hi, how much does it cost?",
+    "question (20 words)": (
+        "Hello there, I just opened my store last week and I'm wondering how I should "
+        "go about getting my first customers"
+    ),
+    "paragraph (80 words)": (
+        "We run a small apparel brand and have been on the platform for about two years. "
+        "Lately our conversion numbers dropped and we're not sure whether it is the new "
+        "theme, the slower pages, or just seasonality. We tried discount popups but they "
+        "felt spammy. Our audience is mostly younger people who find us through short "
+        "videos. What would you recommend we look at first, and is there anything in "
+        "your app that helps with that kind of problem without adding more clutter?"
+    ),
+    "no match (40 words)": " ".join(["lorem ipsum dolor sit amet consectetur"] * 7),
+}
+
+
+def legacy_first_match(message: str):
+    user_msg = message.lower()
+    for keyword, topic in KEYWORD_MAP.items():
+        if keyword in user_msg:
+            return topic
+    return None
+
+
+def legacy_all_matches(message: str):
+    user_msg = message.lower()
+    return [topic for keyword, topic in KEYWORD_MAP.items() if keyword in user_msg]
+
+
+def per_call_us(fn, message, number):
+    return timeit.timeit(lambda: fn(message), number=number) / number * 1e6
+
+
+def main(number: int = 20000):
+    matcher = KeywordMatcher(KEYWORD_MAP)
+    columns = [
+        ("legacy first", legacy_first_match),
+        ("legacy all", legacy_all_matches),
+        ("matcher first", matcher.first),
+        ("matcher all", matcher.find_all),
+    ]
+    print(f"{'message':<24}" + "".join(f"{name:>16}" for name, _ in columns))
+    for label, message in MESSAGES.items():
+        timings = [per_call_us(fn, message, number) for _, fn in columns]
+        print(f"{label:<24}" + "".join(f"{t:>13.2f} us" for t in timings))
+        print(f"{'':<24}legacy -> {legacy_first_match(message)!r}, "
+              f"matcher -> {[(m.keyword, m.start) for m in matcher.find_all(message)]}")
+
+
+if __name__ == "__main__":
+    main()
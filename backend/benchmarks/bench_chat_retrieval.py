@@ -0,0 +1,50 @@
+"""
+Scoring cost of RetrievalEngine as the knowledge base grows.
+
+Builds synthetic help-center sized indexes (the real TOPICS plus generated
+articles) and times `search` for typical visitor questions.
+
+    python -m benchmarks.bench_chat_retrieval
+"""
+import random
+import time
+import timeit
+
+from app.chat_retrieval import RetrievalEngine
+from app.routers.chat import KEYWORD_MAP, TOPICS
+
+QUERIES = [
+    "How do I improve my SEO?",
+    "What is the best way to increase sales?",
+    "how much does shipping cost to canada",
+    "can I get a refund for my subscription",
+    "my theme is slow on mobile, what apps should I remove",
+]
+
+
+def synthetic_topics(count: int, vocabulary_size: int = 20000, words_per_article: int = 120):
+    rng = random.Random(42)
+    # Real answer words mixed in so query terms have long postings lists
+    vocabulary = [f"term{i}" for i in range(vocabulary_size)]
+    vocabulary += " ".join(TOPICS.values()).split() * 20
+    topics = dict(TOPICS)
+    for i in range(count):
+        topics[f"article_{i}"] = " ".join(rng.choices(vocabulary, k=words_per_article))
+    return topics
+
+
+def main(number: int = 2000):
+    print(f"{'topics':>8}{'build':>12}{'search p50':>14}{'search max':>14}")
+    for count in (0, 1000, 5000, 20000):
+        topics = synthetic_topics(count)
+        started = time.perf_counter()
+        engine = RetrievalEngine(topics, KEYWORD_MAP)
+        build = time.perf_counter() - started
+        per_query = sorted(
+            timeit.timeit(lambda: engine.search(q), number=number) / number * 1e6 for q in QUERIES
+        )
+        print(f"{len(topics):>8}{build:>10.2f} s{per_query[len(per_query) // 2]:>11.1f} us{per_query[-1]:>11.1f} us")
+
+
+if __name__ == "__main__":
+    main()
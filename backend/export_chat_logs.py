@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from app.chat_export import EXPORT_FORMATS, export_chat_logs
+
+async def export(args):
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        async for chunk in export_chat_logs(
+            args.format,
+            compress=args.gzip,
+            start=args.start,
+            end=args.end,
+            session_id=args.session,
+            batch_size=args.batch_size
+        ):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    # Progress goes to stderr so stdout stays a clean export
+    print("Export complete.", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream chat logs to NDJSON or CSV.")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress the output")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="inclusive ISO timestamp")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="exclusive ISO timestamp")
+    parser.add_argument("--session", help="only this session_id")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--output", "-o", help="file to write (default: stdout)")
+    asyncio.run(export(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import re
+from app.database import AsyncSessionLocal
+from app.models import Section
+from app.content_cache import section_cache
+from app.content_bundle import publish_from_database
+from app.section_store import content_digest
+from app.storage import PUBLIC_BASE_URL, sniff_image_type, store_bytes, upload_url
+from sqlalchemy.future import select
+
+DATA_URI_RE = re.compile(r"^data:([\w.+-]+/[\w.+-]+)?(?:;[\w=-]+)*;base64,(.*)$", re.DOTALL)
+
+def extract(node, base_url, dry_run, found):
+    # Returns a copy of `node` with every base64 data: URI replaced by a file URL
+    if isinstance(node, dict):
+        return {key: extract(value, base_url, dry_run, found) for key, value in node.items()}
+    if isinstance(node, list):
+        return [extract(value, base_url, dry_run, found) for value in node]
+    if isinstance(node, str):
+        match = DATA_URI_RE.match(node)
+        if not match:
+            return node
+        try:
+            data = base64.b64decode(match.group(2), validate=True)
+        except (binascii.Error, ValueError):
+            print("  skipping a malformed data URI")
+            return node
+        if sniff_image_type(data[:64]) is None:
+            # Only images are ever served from static/uploads
+            print(f"  skipping a non-image data URI ({match.group(1) or 'no type'})")
+            return node
+        found.append(len(data))
+        if dry_run:
+            return upload_url("<sha256>", base_url)
+        return upload_url(store_bytes(data), base_url)
+    return node
+
+def encoded_size(content):
+    return len(json.dumps(content, ensure_ascii=False).encode("utf-8"))
+
+async def migrate(base_url, dry_run):
+    total_saved = 0
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Section))
+        for section in result.scalars().all():
+            found = []
+            content = extract(section.content, base_url, dry_run, found)
+            if not found:
+                continue
+            saved = encoded_size(section.content) - encoded_size(content)
+            total_saved += saved
+            print(f"{section.key}: {len(found)} image(s), {sum(found)} bytes extracted, {saved} bytes saved")
+            if not dry_run:
+                section.content = content
+                # An editor holding If-Match on the old version must not write the data URIs back
+                section.version += 1
+                section.content_hash = content_digest(content)
+
+        if dry_run:
+            print(f"Dry run: {total_saved} bytes would be saved. Nothing was written.")
+            return
+        # Other workers reload their section cache when this commits
+        await section_cache.notify_change(db)
+        await db.commit()
+    # Otherwise the published bundle keeps serving the data URIs
+    await publish_from_database()
+    print(f"Migration complete: {total_saved} bytes saved.")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move base64 data: images out of Section content into static/uploads. Safe to re-run."
+    )
+    parser.add_argument("--base-url", default=PUBLIC_BASE_URL, help="public origin of this API (default: PUBLIC_BASE_URL)")
+    parser.add_argument("--dry-run", action="store_true", help="report savings without writing files or the database")
+    args = parser.parse_args()
+    if not args.base_url and not args.dry_run:
+        parser.error("--base-url (or PUBLIC_BASE_URL) is required so the frontend can load the files")
+    asyncio.run(migrate(args.base_url, args.dry_run))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import asyncio
+from app.database import engine
+from app.partitions import convert_to_partitioned, list_partitions, maintain_partitions, prune_session_hours
+
+async def show():
+    async with engine.connect() as conn:
+        for name, start, end in await list_partitions(conn):
+            print(f"{name}: {start.isoformat()} -> {end.isoformat()}")
+
+async def maintain():
+    result = await maintain_partitions()
+    result["session_hours_pruned"] = await prune_session_hours()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage time partitions of chat_logs.")
+    parser.add_argument(
+        "command",
+        choices=["convert", "maintain", "list"],
+        help="convert: migrate a plain chat_logs table; maintain: create upcoming and archive expired partitions; list: show partitions"
+    )
+    args = parser.parse_args()
+    if args.command == "convert":
+        asyncio.run(convert_to_partitioned())
+    elif args.command == "maintain":
+        print(asyncio.run(maintain()))
+    else:
+        asyncio.run(show())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import argparse
+import asyncio
+from app.content_bundle import BUNDLE_DIR, bundle_url, write_bundle
+from app.content_cache import section_cache
+
+async def publish(args):
+    # Always read the database; the disk snapshot is only a fallback for live requests
+    await section_cache.refresh(force=True)
+    manifest = await asyncio.to_thread(write_bundle, section_cache.snapshot)
+    print(f"Published {manifest['bytes']} bytes to {BUNDLE_DIR / manifest['bundle']}")
+    print(f"Bundle URL: {bundle_url(manifest['bundle'], args.base_url)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish all sections as a static, content-hashed JSON bundle.")
+    parser.add_argument("--base-url", help="origin serving /static (default: CONTENT_BUNDLE_BASE_URL or PUBLIC_BASE_URL)")
+    asyncio.run(publish(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+import pytest
+
+# The app reads its configuration at import time: point it at a scratch SQLite
+# database and working directory before any test imports it
+WORKDIR = tempfile.mkdtemp(prefix="smartpromo-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{WORKDIR}/test.db"
+os.environ["CLOUDINARY_CLOUD_NAME"] = ""
+# The chat log writer wakes up this often, which bounds how long shutdown takes
+os.environ["CHAT_LOG_FLUSH_INTERVAL"] = "0.05"
+os.environ.pop("METRICS_TOKEN", None)
+os.chdir(WORKDIR)  # static/ and var/ land here
+
+TEST_USER = "test-admin"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    httpx = pytest.importorskip("httpx")
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            yield http
+
+
+@pytest.fixture
+async def auth_headers(client):
+    from sqlalchemy.future import select
+
+    from app.auth import create_access_token
+    from app.database import AsyncSessionLocal
+    from app.models import User
+
+    async with AsyncSessionLocal() as db:
+        if (await db.execute(select(User).where(User.username == TEST_USER))).scalars().first() is None:
+            db.add(User(username=TEST_USER, hashed_password="unused"))
+            await db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': TEST_USER})}"}
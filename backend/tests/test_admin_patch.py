@@ -0,0 +1,208 @@
+import copy
+import os
+import uuid
+
+import pytest
+
+from app.json_patch import JsonPatchError, apply_patch, replace_paths
+
+pytestmark = pytest.mark.anyio
+
+DOCUMENT = {"title": "Hero", "items": [{"name": "a"}, {"name": "b"}], "meta": {"draft": True, "tags": ["x"]}}
+
+
+async def create_section(client, auth_headers, content=DOCUMENT):
+    key = f"test_{uuid.uuid4().hex[:8]}"
+    response = await client.put(f"/api/admin/content/{key}", headers=auth_headers, json={"content": content})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"1"'
+    return key
+
+
+async def public_content(client, key):
+    response = await client.get(f"/api/public/content/{key}")
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_patch_applies_every_op_and_bumps_version(client, auth_headers):
+    key = await create_section(client, auth_headers)
+    patch = [
+        {"op": "test", "path": "/meta/draft", "value": True},
+        {"op": "replace", "path": "/title", "value": "New hero"},
+        {"op": "add", "path": "/items/-", "value": {"name": "c"}},
+        {"op": "remove", "path": "/items/0"},
+        {"op": "move", "from": "/meta/tags", "path": "/tags"},
+        {"op": "copy", "from": "/items/0", "path": "/featured"},
+    ]
+    response = await client.patch(
+        f"/api/admin/content/{key}", headers={**auth_headers, "If-Match": '"1"'}, json=patch
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["etag"] == '"2"'
+
+    section = await public_content(client, key)
+    assert section["version"] == 2
+    assert section["content"] == apply_patch(DOCUMENT, patch)
+
+
+async def test_stale_if_match_is_rejected(client, auth_headers):
+    key = await create_section(client, auth_headers)
+    replace = [{"op": "replace", "path": "/title", "value": "First"}]
+    assert (await client.patch(f"/api/admin/content/{key}", headers={**auth_headers, "If-Match": '"1"'}, json=replace)).status_code == 200
+
+    response = await client.patch(
+        f"/api/admin/content/{key}", headers={**auth_headers, "If-Match": '"1"'},
+        json=[{"op": "replace", "path": "/title", "value": "Second"}],
+    )
+    assert response.status_code == 412
+    assert response.headers["etag"] == '"2"'
+    assert (await public_content(client, key))["content"]["title"] == "First"
+
+    # The same precondition applies to full writes
+    response = await client.put(f"/api/admin/content/{key}", headers={**auth_headers, "If-Match": 'W/"1", "7"'}, json={"content": {}})
+    assert response.status_code == 412
+
+
+async def test_if_match_list_and_wildcard(client, auth_headers):
+    key = await create_section(client, auth_headers)
+    replace = [{"op": "replace", "path": "/title", "value": "A"}]
+    assert (await client.patch(f"/api/admin/content/{key}", headers={**auth_headers, "If-Match": '"5", W/"1"'}, json=replace)).status_code == 200
+    assert (await client.patch(f"/api/admin/content/{key}", headers={**auth_headers, "If-Match": "*"}, json=replace)).status_code == 200
+    response = await client.patch(f"/api/admin/content/{key}", headers={**auth_headers, "If-Match": "abc"}, json=replace)
+    assert response.status_code == 400
+
+
+async def test_failed_test_op_is_a_conflict_and_writes_nothing(client, auth_headers):
+    key = await create_section(client, auth_headers)
+    response = await client.patch(f"/api/admin/content/{key}", headers=auth_headers, json=[
+        {"op": "replace", "path": "/title", "value": "Changed"},
+        {"op": "test", "path": "/meta/draft", "value": False},
+    ])
+    assert response.status_code == 409
+    section = await public_content(client, key)
+    assert section["version"] == 1
+    assert section["content"] == DOCUMENT
+
+
+@pytest.mark.parametrize("patch", [
+    [{"op": "replace", "path": "/missing", "value": 1}],
+    [{"op": "remove", "path": "/items/5"}],
+    [{"op": "add", "path": "/title/x", "value": 1}],
+    [{"op": "move", "from": "/meta", "path": "/meta/inner"}],
+    [{"op": "replace", "path": "title", "value": 1}],
+    [{"op": "nope", "path": "/title"}],
+    {"op": "replace", "path": "/title", "value": 1},
+    # The section must stay a JSON object
+    [{"op": "replace", "path": "", "value": [1, 2]}],
+    [{"op": "add", "path": "", "value": "text"}],
+    [{"op": "move", "from": "/meta", "path": ""}, {"op": "replace", "path": "", "value": None}],
+])
+async def test_bad_patches_are_unprocessable(client, auth_headers, patch):
+    key = await create_section(client, auth_headers)
+    response = await client.patch(f"/api/admin/content/{key}", headers=auth_headers, json=patch)
+    assert response.status_code == 422
+    assert (await public_content(client, key))["version"] == 1
+    # Later writes still go through
+    response = await client.put(f"/api/admin/content/{key}", headers=auth_headers, json={"content": {"ok": True}})
+    assert response.status_code == 200
+
+
+async def test_missing_section(client, auth_headers):
+    response = await client.patch("/api/admin/content/does_not_exist", headers=auth_headers, json=[
+        {"op": "replace", "path": "/title", "value": 1},
+    ])
+    assert response.status_code == 404
+    response = await client.put("/api/admin/content/does_not_exist", headers={**auth_headers, "If-Match": '"1"'}, json={"content": {}})
+    assert response.status_code == 412
+
+
+async def test_patch_requires_auth(client):
+    response = await client.patch("/api/admin/content/anything", json=[])
+    assert response.status_code == 401
+
+
+# --- jsonb_set fast path (Postgres only) ---
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+REPLACE_PATCHES = [
+    [{"op": "replace", "path": "/title", "value": "New"}],
+    [{"op": "replace", "path": "/items/1/name", "value": "B"}, {"op": "replace", "path": "/meta/draft", "value": None}],
+    [{"op": "replace", "path": "/meta", "value": {"nested": [1, 2.5, "ü"]}}],
+    [{"op": "replace", "path": "/items/0", "value": {"name": "z"}}, {"op": "replace", "path": "/items/0/name", "value": "zz"}],
+    [{"op": "replace", "path": "/meta/tags/0", "value": False}],
+]
+
+MISSING_PATHS = [
+    [{"op": "replace", "path": "/nope", "value": 1}],
+    [{"op": "replace", "path": "/items/9/name", "value": 1}],
+    [{"op": "replace", "path": "/items/name", "value": 1}],
+    [{"op": "replace", "path": "/title/x", "value": 1}],
+]
+
+
+@pytest.fixture
+async def postgres_session():
+    if not TEST_POSTGRES_URL:
+        pytest.skip("set TEST_POSTGRES_URL (postgresql+asyncpg://...) to compare against jsonb_set")
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from app.models import Section
+
+    engine = create_async_engine(TEST_POSTGRES_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: Section.__table__.create(sync_conn, checkfirst=True))
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        yield db
+        # Everything the test wrote is rolled back
+        await db.rollback()
+    await engine.dispose()
+
+
+async def insert_section(db, content):
+    from app.models import Section
+
+    key = f"test_{uuid.uuid4().hex[:8]}"
+    db.add(Section(key=key, content=copy.deepcopy(content), version=1))
+    await db.flush()
+    return key
+
+
+async def stored_content(db, key):
+    from sqlalchemy.future import select
+
+    from app.models import Section
+
+    return (await db.execute(select(Section.content).where(Section.key == key))).scalar_one()
+
+
+@pytest.mark.parametrize("patch", REPLACE_PATCHES)
+async def test_jsonb_set_matches_python(postgres_session, patch):
+    from app.routers.admin import patch_in_database
+
+    key = await insert_section(postgres_session, DOCUMENT)
+    row = await patch_in_database(postgres_session, key, replace_paths(patch), {1})
+    assert row is not None and row[0] == 2
+    assert await stored_content(postgres_session, key) == apply_patch(DOCUMENT, patch)
+
+
+@pytest.mark.parametrize("patch", MISSING_PATHS)
+async def test_jsonb_set_defers_missing_paths_to_python(postgres_session, patch):
+    from app.routers.admin import patch_in_database
+
+    key = await insert_section(postgres_session, DOCUMENT)
+    # None sends the request to the Python path, which reports the error
+    assert await patch_in_database(postgres_session, key, replace_paths(patch), None) is None
+    assert await stored_content(postgres_session, key) == DOCUMENT
+    with pytest.raises(JsonPatchError):
+        apply_patch(DOCUMENT, patch)
+
+
+async def test_jsonb_set_checks_version(postgres_session):
+    from app.routers.admin import patch_in_database
+
+    key = await insert_section(postgres_session, DOCUMENT)
+    assert await patch_in_database(postgres_session, key, replace_paths(REPLACE_PATCHES[0]), {2}) is None
+    assert await stored_content(postgres_session, key) == DOCUMENT
@@ -0,0 +1,34 @@
+import pytest
+from sqlalchemy import delete
+
+from app.auth import invalidate_user, token_cache
+from app.database import AsyncSessionLocal
+from app.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_invalidate_user_revokes_cached_tokens(client, auth_headers):
+    from tests.conftest import TEST_USER
+
+    token_cache.clear()
+    assert (await client.get("/api/chat/cache-stats", headers=auth_headers)).status_code == 200
+    assert len(token_cache) == 1
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(User).where(User.username == TEST_USER))
+        await db.commit()
+    # Still served from the cache until the user is invalidated
+    assert (await client.get("/api/chat/cache-stats", headers=auth_headers)).status_code == 200
+
+    invalidate_user("someone-else")
+    assert len(token_cache) == 1
+    invalidate_user(TEST_USER)
+    assert len(token_cache) == 0
+    assert (await client.get("/api/chat/cache-stats", headers=auth_headers)).status_code == 401
+
+
+def test_invalidate_user_without_a_name_clears_everything():
+    token_cache.set("token", object())
+    invalidate_user()
+    assert len(token_cache) == 0
@@ -0,0 +1,28 @@
+import pytest
+
+from app.chat_matcher import KeywordMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return KeywordMatcher({"ad": "marketing", "sale": "marketing", "hi": "greeting", "ship": "shipping"})
+
+
+def test_find_all_returns_whole_word_matches_with_positions(matcher):
+    text = "Hi! Ads and SALES, but not shipping or this"
+    assert [(m.keyword, m.value, m.start, m.end) for m in matcher.find_all(text)] == [
+        ("hi", "greeting", 0, 2),
+        ("ad", "marketing", 4, 7),
+        ("sale", "marketing", 12, 17),
+    ]
+
+
+def test_first(matcher):
+    assert matcher.first("which ads work best").keyword == "ad"
+    assert matcher.first("shipping question") is None
+    assert matcher.find_all("") == []
+
+
+def test_keywords_must_be_single_words():
+    with pytest.raises(ValueError):
+        KeywordMatcher({"free trial": "pricing"})
@@ -0,0 +1,68 @@
+import pytest
+
+from app.chat_retrieval import RetrievalEngine, analyze, stem
+
+TOPICS = {
+    "pricing": "Our plans start at $9 per month. Every plan includes a free trial.",
+    "shipping": "Set shipping rates and zones in Settings. Carriers calculate rates at checkout.",
+    "seo": "Use keywords in titles and descriptions so search engines rank your store.",
+}
+SYNONYMS = {"cost": "pricing", "delivery": "shipping", "google": "seo", "orphan": "missing_topic"}
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return RetrievalEngine(TOPICS, SYNONYMS)
+
+
+def test_analyze_drops_stopwords_and_folds_plurals():
+    assert analyze("How do I set the Shipping RATES?") == ["set", "shipping", "rate"]
+    assert stem("ads") == "ads"  # too short to fold
+    assert stem("glass") == "glass"
+
+
+def test_search_ranks_the_best_topic_first(engine):
+    hits = engine.search("what are your shipping rates")
+    assert hits[0].topic == "shipping"
+    assert [hit.score for hit in hits] == sorted((hit.score for hit in hits), reverse=True)
+
+
+def test_synonyms_and_topic_names_are_indexed(engine):
+    assert engine.search("delivery")[0].topic == "shipping"
+    assert engine.search("google")[0].topic == "seo"
+    assert engine.search("pricing")[0].topic == "pricing"
+    # Synonyms for unknown topics are ignored
+    assert engine.search("orphan") == []
+
+
+def test_no_overlap_returns_nothing(engine):
+    assert engine.search("") == []
+    assert engine.search("the and of") == []
+    assert engine.search("zebra") == []
+    assert engine.answer_topics("zebra") == []
+
+
+def test_k_is_bounded_by_the_number_of_topics(engine):
+    assert len(engine.search("plan rates keywords", k=10)) == 3
+
+
+def test_answer_topics_applies_threshold_and_runner_up_ratio(engine):
+    assert engine.answer_topics("cost", min_score=1e9) == []
+    both = engine.answer_topics("shipping price cost", min_score=0, combine_ratio=0)
+    assert sorted(hit.topic for hit in both) == ["pricing", "shipping"]
+    assert len(engine.answer_topics("shipping price cost", min_score=0, combine_ratio=1.01)) == 1
+
+
+@pytest.mark.parametrize("message, topic", [
+    ("How do I improve my SEO?", "seo"),
+    ("how to install the app", "install"),
+    ("shipping rates", "shipping"),
+    ("what does pricing look like", "pricing"),
+    ("hello there", "greeting"),
+    ("thanks!", "thanks"),
+    ("something completely unrelated", None),
+])
+def test_chatbot_replies(message, topic):
+    from app.routers.chat import generate_response, normalize_message
+
+    assert generate_response(normalize_message(message))[1] == topic
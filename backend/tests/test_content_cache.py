@@ -0,0 +1,26 @@
+import pytest
+
+from app import content_cache
+from app.content_cache import SectionCache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_invalidation_during_refresh_is_not_lost(client, monkeypatch):
+    cache = SectionCache(snapshot_path=None)
+    cache.listening = True  # as with a LISTEN connection: fresh until notified
+
+    build_snapshot = content_cache.ContentSnapshot
+
+    def notify_while_serializing(*args):
+        cache._on_notify(None, 0, content_cache.NOTIFY_CHANNEL, "")
+        return build_snapshot(*args)
+
+    monkeypatch.setattr(content_cache, "ContentSnapshot", notify_while_serializing)
+    await cache.refresh()
+    assert cache.snapshot is not None
+    assert not cache.is_fresh()
+
+    monkeypatch.setattr(content_cache, "ContentSnapshot", build_snapshot)
+    await cache.refresh()
+    assert cache.is_fresh()
@@ -0,0 +1,34 @@
+import io
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image, features  # noqa: E402
+
+from app.storage import store_bytes  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+
+def encode(fmt: str) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (800, 400), (200, 40, 40)).save(out, fmt)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("fmt", ["PNG", "JPEG", "WEBP", "AVIF"])
+async def test_every_stored_type_has_variants(client, fmt):
+    if fmt == "AVIF" and not features.check("avif"):
+        pytest.skip("Pillow built without AVIF")
+    name = store_bytes(encode(fmt))
+    assert (await client.get(f"/static/uploads/{name}")).status_code == 200
+
+    response = await client.get(f"/static/img/{name}?w=320", headers={"Accept": "image/webp"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    with Image.open(io.BytesIO(response.content)) as variant:
+        assert variant.width == 320
+
+
+async def test_unknown_upload_is_404(client):
+    assert (await client.get(f"/static/img/{'0' * 64}.bmp?w=320")).status_code == 404
@@ -0,0 +1,107 @@
+import pytest
+
+from app.json_patch import JsonPatchConflict, JsonPatchError, apply_patch, parse_pointer, replace_paths, validate_patch
+
+
+@pytest.mark.parametrize("doc, patch, expected", [
+    # RFC 6902 appendix A examples
+    ({"foo": "bar"}, [{"op": "add", "path": "/baz", "value": "qux"}], {"foo": "bar", "baz": "qux"}),
+    ({"foo": ["bar", "baz"]}, [{"op": "add", "path": "/foo/1", "value": "qux"}], {"foo": ["bar", "qux", "baz"]}),
+    ({"foo": ["bar"]}, [{"op": "add", "path": "/foo/-", "value": ["abc"]}], {"foo": ["bar", ["abc"]]}),
+    ({"baz": "qux", "foo": "bar"}, [{"op": "remove", "path": "/baz"}], {"foo": "bar"}),
+    ({"foo": ["bar", "qux", "baz"]}, [{"op": "remove", "path": "/foo/1"}], {"foo": ["bar", "baz"]}),
+    ({"baz": "qux", "foo": "bar"}, [{"op": "replace", "path": "/baz", "value": "boo"}], {"baz": "boo", "foo": "bar"}),
+    (
+        {"foo": {"bar": "baz", "waldo": "fred"}, "qux": {"corge": "grault"}},
+        [{"op": "move", "from": "/foo/waldo", "path": "/qux/thud"}],
+        {"foo": {"bar": "baz"}, "qux": {"corge": "grault", "thud": "fred"}},
+    ),
+    (
+        {"foo": ["all", "grass", "cows", "eat"]},
+        [{"op": "move", "from": "/foo/1", "path": "/foo/3"}],
+        {"foo": ["all", "cows", "eat", "grass"]},
+    ),
+    ({"foo": "bar"}, [{"op": "add", "path": "/child", "value": {"grandchild": {}}}], {"foo": "bar", "child": {"grandchild": {}}}),
+    ({"foo": ["bar"]}, [{"op": "copy", "from": "/foo/0", "path": "/baz"}], {"foo": ["bar"], "baz": "bar"}),
+    (
+        {"baz": "qux", "foo": ["a", 2, "c"]},
+        [{"op": "test", "path": "/baz", "value": "qux"}, {"op": "test", "path": "/foo/1", "value": 2}],
+        {"baz": "qux", "foo": ["a", 2, "c"]},
+    ),
+    ({"/": 9, "~1": 10}, [{"op": "replace", "path": "/~01", "value": 11}], {"/": 9, "~1": 11}),
+    ({"a/b": 1}, [{"op": "remove", "path": "/a~1b"}], {}),
+    ({"items": [1, 2]}, [{"op": "replace", "path": "/items/0", "value": None}], {"items": [None, 2]}),
+    ({"a": 1}, [{"op": "replace", "path": "", "value": [1]}], [1]),
+])
+def test_operations(doc, patch, expected):
+    assert apply_patch(doc, patch) == expected
+
+
+def test_replace_keeps_key_order():
+    result = apply_patch({"a": 1, "b": 2, "c": 3}, [{"op": "replace", "path": "/b", "value": 20}])
+    assert list(result) == ["a", "b", "c"]
+
+
+def test_copy_is_independent_of_source():
+    result = apply_patch({"a": {"x": 1}}, [{"op": "copy", "from": "/a", "path": "/b"}, {"op": "add", "path": "/b/y", "value": 2}])
+    assert result == {"a": {"x": 1}, "b": {"x": 1, "y": 2}}
+
+
+def test_failed_test_raises_conflict():
+    with pytest.raises(JsonPatchConflict):
+        apply_patch({"baz": "qux"}, [{"op": "test", "path": "/baz", "value": "bar"}])
+
+
+def test_failure_leaves_input_untouched():
+    doc = {"items": [1, 2], "title": "A"}
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, [{"op": "remove", "path": "/items/0"}, {"op": "replace", "path": "/missing", "value": 1}])
+    assert doc == {"items": [1, 2], "title": "A"}
+
+
+@pytest.mark.parametrize("doc, operation", [
+    ({"foo": "bar"}, {"op": "add", "path": "/baz/bat", "value": "qux"}),  # parent does not exist
+    ({"foo": "bar"}, {"op": "remove", "path": "/baz"}),
+    ({"foo": "bar"}, {"op": "replace", "path": "/baz", "value": 1}),
+    ({"foo": [1]}, {"op": "add", "path": "/foo/2", "value": 1}),  # past the end
+    ({"foo": [1]}, {"op": "replace", "path": "/foo/1", "value": 1}),
+    ({"foo": [1, 2]}, {"op": "remove", "path": "/foo/01"}),  # leading zero
+    ({"foo": [1]}, {"op": "remove", "path": "/foo/-1"}),
+    ({"foo": [1]}, {"op": "remove", "path": "/foo/bar"}),
+    ({"foo": "bar"}, {"op": "add", "path": "/foo/x", "value": 1}),  # into a scalar
+    ({"foo": "bar"}, {"op": "remove", "path": ""}),
+    ({"foo": {"bar": 1}}, {"op": "move", "from": "/foo", "path": "/foo/bar/baz"}),
+    ({"foo": "bar"}, {"op": "copy", "from": "/nope", "path": "/baz"}),
+    ({"foo": "bar"}, {"op": "test", "path": "/nope", "value": None}),
+])
+def test_bad_paths(doc, operation):
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, [operation])
+
+
+@pytest.mark.parametrize("patch", [
+    {"op": "add", "path": "/a", "value": 1},  # not an array
+    [{"op": "frobnicate", "path": "/a"}],
+    [{"path": "/a", "value": 1}],
+    [{"op": "add", "path": "/a"}],  # missing value
+    [{"op": "move", "path": "/a"}],  # missing from
+    [{"op": "replace", "path": "a", "value": 1}],  # pointer without a leading slash
+    [{"op": "copy", "from": "x", "path": "/a"}],
+    ["add"],
+])
+def test_invalid_patches(patch):
+    with pytest.raises(JsonPatchError):
+        validate_patch(patch)
+
+
+def test_parse_pointer():
+    assert parse_pointer("") == []
+    assert parse_pointer("/") == [""]
+    assert parse_pointer("/a~1b/c~0d/~01") == ["a/b", "c~d", "~1"]
+
+
+def test_replace_paths():
+    assert replace_paths([{"op": "replace", "path": "/a/0", "value": 1}]) == [(["a", "0"], 1)]
+    assert replace_paths([{"op": "replace", "path": "/a", "value": 1}, {"op": "add", "path": "/b", "value": 2}]) is None
+    assert replace_paths([{"op": "replace", "path": "", "value": {}}]) is None
+    assert replace_paths([]) is None
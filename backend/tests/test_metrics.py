@@ -0,0 +1,37 @@
+import importlib
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def metrics_client(monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    monkeypatch.setenv("METRICS_TOKEN", "s3cret")
+    import app.main
+
+    # METRICS_TOKEN decides at import whether the route exists
+    app_module = importlib.reload(app.main)
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http
+    monkeypatch.delenv("METRICS_TOKEN")
+    importlib.reload(app.main)
+
+
+async def test_metrics_token(metrics_client):
+    assert (await metrics_client.get("/metrics")).status_code == 401
+    assert (await metrics_client.get("/metrics", headers={"Authorization": "Bearer nope"})).status_code == 401
+    response = await metrics_client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+async def test_non_ascii_authorization_is_a_401(metrics_client):
+    response = await metrics_client.get("/metrics", headers={"Authorization": "Bearer caf\xe9".encode("latin-1")})
+    assert response.status_code == 401
+
+
+async def test_metrics_not_served_without_a_token(client):
+    assert (await client.get("/metrics")).status_code == 404
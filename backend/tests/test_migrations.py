@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from app import migrations
+from app.migrations import SchemaGate
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_schema_gate_retries_until_the_database_answers(monkeypatch):
+    attempts = []
+
+    async def migrate(engine):
+        attempts.append(engine)
+        if len(attempts) < 3:
+            raise ConnectionRefusedError(111, "Connect call failed")
+        return 0
+
+    monkeypatch.setattr(migrations, "migrate", migrate)
+    gate = SchemaGate(timeout=1, retry_interval=0.01)
+    assert await gate.start("engine") is False
+    assert not gate.ready
+    for _ in range(100):
+        if gate.ready:
+            break
+        await asyncio.sleep(0.01)
+    assert gate.ready
+    assert len(attempts) == 3
+    await gate.stop()
+
+
+async def test_admin_writes_wait_for_the_schema(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(migrations.schema_gate, "ready", False)
+    response = await client.put("/api/admin/content/anything", headers=auth_headers, json={"content": {}})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    # Public reads are unaffected
+    assert (await client.get("/api/public/all-content")).status_code == 200
@@ -0,0 +1,172 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+
+from app import partitions
+from app.partitions import next_start, parse_bound, partition_name, partition_start
+
+UTC = timezone.utc
+
+
+@pytest.mark.parametrize("interval, ts, start", [
+    ("month", datetime(2026, 10, 18, 13, 5, tzinfo=UTC), datetime(2026, 10, 1, tzinfo=UTC)),
+    ("week", datetime(2026, 10, 18, 13, 5, tzinfo=UTC), datetime(2026, 10, 12, tzinfo=UTC)),  # a Sunday -> Monday
+    ("day", datetime(2026, 10, 18, 13, 5, tzinfo=UTC), datetime(2026, 10, 18, tzinfo=UTC)),
+    # Bucketed in UTC whatever the input offset
+    ("day", datetime.fromisoformat("2026-10-01T01:00:00+05:00"), datetime(2026, 9, 30, tzinfo=UTC)),
+])
+def test_partition_start(interval, ts, start):
+    assert partition_start(ts, interval) == start
+
+
+def test_partition_start_rejects_unknown_interval():
+    with pytest.raises(ValueError):
+        partition_start(datetime(2026, 1, 1, tzinfo=UTC), "year")
+
+
+@pytest.mark.parametrize("interval, start, following", [
+    ("month", datetime(2026, 11, 1, tzinfo=UTC), datetime(2026, 12, 1, tzinfo=UTC)),
+    ("month", datetime(2026, 12, 1, tzinfo=UTC), datetime(2027, 1, 1, tzinfo=UTC)),
+    ("week", datetime(2026, 12, 28, tzinfo=UTC), datetime(2027, 1, 4, tzinfo=UTC)),
+    ("day", datetime(2028, 2, 28, tzinfo=UTC), datetime(2028, 2, 29, tzinfo=UTC)),
+])
+def test_next_start(interval, start, following):
+    assert next_start(start, interval) == following
+
+
+def test_partition_name():
+    assert partition_name(datetime(2026, 3, 1, tzinfo=UTC), "month") == "chat_logs_p2026_03"
+    assert partition_name(datetime(2026, 3, 2, tzinfo=UTC), "week") == "chat_logs_p2026_03_02"
+
+
+def test_parse_bound():
+    assert parse_bound("2026-10-01 00:00:00+00") == datetime(2026, 10, 1, tzinfo=UTC)
+    assert parse_bound("2026-10-01 00:00:00+00:00") == datetime(2026, 10, 1, tzinfo=UTC)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return FakeResult(self.rows)
+
+
+def month(year, month_):
+    return datetime(year, month_, 1, tzinfo=UTC)
+
+
+@pytest.mark.anyio
+async def test_list_partitions_parses_bounds():
+    conn = FakeConnection([
+        ("chat_logs_p2026_11", "FOR VALUES FROM ('2026-11-01 00:00:00+00') TO ('2026-12-01 00:00:00+00')"),
+        ("chat_logs_default", "DEFAULT"),
+        ("chat_logs_p2026_10", "FOR VALUES FROM ('2026-10-01 00:00:00+00') TO ('2026-11-01 00:00:00+00')"),
+    ])
+    assert await partitions.list_partitions(conn) == [
+        ("chat_logs_p2026_10", month(2026, 10), month(2026, 11)),
+        ("chat_logs_p2026_11", month(2026, 11), month(2026, 12)),
+    ]
+
+
+@pytest.mark.anyio
+async def test_ensure_partitions_creates_only_missing_ranges(monkeypatch):
+    existing = [("chat_logs_p2026_10", month(2026, 10), month(2026, 11))]
+
+    async def list_partitions(conn):
+        return existing
+
+    monkeypatch.setattr(partitions, "list_partitions", list_partitions)
+    monkeypatch.setattr(partitions, "CHAT_LOG_PARTITIONS_AHEAD", 2)
+    conn = FakeConnection()
+
+    created = await partitions.ensure_partitions(
+        conn, now=datetime(2026, 10, 18, tzinfo=UTC), since=datetime(2026, 8, 5, tzinfo=UTC)
+    )
+    assert created == ["chat_logs_p2026_08", "chat_logs_p2026_09", "chat_logs_p2026_11", "chat_logs_p2026_12"]
+    assert len(conn.statements) == 4
+    assert "FOR VALUES FROM ('2026-12-01T00:00:00+00:00') TO ('2027-01-01T00:00:00+00:00')" in conn.statements[-1]
+
+
+@pytest.mark.anyio
+async def test_apply_retention_archives_before_dropping(monkeypatch):
+    # Two partitions past the 90-day cutoff, one inside it; one left detached by an earlier run
+    listed = [
+        ("chat_logs_p2026_05", month(2026, 5), month(2026, 6)),
+        ("chat_logs_p2026_06", month(2026, 6), month(2026, 7)),
+        ("chat_logs_p2026_10", month(2026, 10), month(2026, 11)),
+    ]
+    conn = FakeConnection()
+    events = []
+
+    class FakeEngine:
+        @asynccontextmanager
+        async def begin(self):
+            yield conn
+
+    async def list_partitions(_):
+        return listed
+
+    async def detached_partitions(_):
+        return ["chat_logs_p2026_04"] + [
+            name for name, _, _ in listed if any(f'DETACH PARTITION "{name}"' in s for s in conn.statements)
+        ]
+
+    async def archive_table(name):
+        events.append(("archive", name, len(conn.statements)))
+        return f"archive/{name}.ndjson.gz"
+
+    monkeypatch.setattr(partitions, "engine", FakeEngine())
+    monkeypatch.setattr(partitions, "list_partitions", list_partitions)
+    monkeypatch.setattr(partitions, "detached_partitions", detached_partitions)
+    monkeypatch.setattr(partitions, "archive_table", archive_table)
+
+    archived = await partitions.apply_retention(now=datetime(2026, 10, 18, tzinfo=UTC), retention_days=90)
+
+    assert archived == ["chat_logs_p2026_04", "chat_logs_p2026_05", "chat_logs_p2026_06"]
+    assert not any("chat_logs_p2026_10" in s for s in conn.statements)
+    assert not any(s.startswith("DELETE") for s in conn.statements)
+    for name in archived:
+        drop = conn.statements.index(f'DROP TABLE "{name}"')
+        # Each table is dropped only after its archive was written
+        assert next(count for event, archived_name, count in events if archived_name == name) <= drop
+
+
+@pytest.mark.anyio
+async def test_retention_disabled(monkeypatch):
+    monkeypatch.setattr(partitions, "engine", None)
+    assert await partitions.apply_retention(retention_days=0) == []
+
+
+@pytest.mark.anyio
+async def test_session_hours_are_pruned_on_any_backend(client):
+    from sqlalchemy import select
+
+    from app.database import AsyncSessionLocal
+    from app.models import ChatSessionHour
+
+    now = datetime(2030, 1, 10, 12, tzinfo=UTC)
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            ChatSessionHour(hour=datetime(2030, 1, 1, 5, tzinfo=UTC), session_id="old"),
+            ChatSessionHour(hour=datetime(2030, 1, 10, 11, tzinfo=UTC), session_id="recent"),
+        ])
+        await db.commit()
+
+    assert await partitions.prune_session_hours(now) >= 1
+    async with AsyncSessionLocal() as db:
+        remaining = (await db.execute(
+            select(ChatSessionHour.session_id).where(ChatSessionHour.hour >= datetime(2030, 1, 1, tzinfo=UTC))
+        )).scalars().all()
+    assert remaining == ["recent"]
@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useState, useLayoutEffect } from 'react';
-import { getAllContent, updateContent } from '@/lib/api';
+import { diffContent, getAllContent, patchContent } from '@/lib/api';
 import AdminSidebar from '@/components/admin/AdminSidebar';
 import DynamicEditor from '@/components/admin/DynamicEditor';
 import { Save, ExternalLink, RefreshCw, CheckCircle } from 'lucide-react';
@@ -64,17 +64,29 @@ export default function AdminPage() {
 
     const handleSave = async () => {
         if (!selectedKey || !editBuffer) return;
+        const section = sections.find(s => s.key === selectedKey);
+        const ops = diffContent(section?.content ?? {}, editBuffer);
+        if (ops.length === 0) {
+            setSuccessMsg("No changes to save.");
+            setTimeout(() => setSuccessMsg(null), 3000);
+            return;
+        }
 
         setSaving(true);
         try {
-            await updateContent(selectedKey, editBuffer);
+            const saved = await patchContent(selectedKey, ops, section?.version);
             // Update local sections state
-            setSections(prev => prev.map(s => s.key === selectedKey ? { ...s, content: editBuffer, last_updated: new Date().toISOString() } : s));
+            setSections(prev => prev.map(s => s.key === selectedKey ? { ...s, content: editBuffer, version: saved.version, last_updated: saved.last_updated } : s));
 
             setSuccessMsg("Changes saved successfully!");
             setTimeout(() => setSuccessMsg(null), 3000);
-        } catch (e) {
-            alert('Failed to save content.');
+        } catch (e: any) {
+            if (e?.response?.status === 412) {
+                alert('This section was changed by someone else. Reloading the latest version; please re-apply your edits.');
+                await fetchContent();
+            } else {
+                alert('Failed to save content.');
+            }
         } finally {
             setSaving(false);
         }
@@ -1,4 +1,5 @@
-import { getAllContent } from '@/lib/api';
+import { cache } from 'react';
+import { getPublishedContent } from '@/lib/api';
 import Navbar from '@/components/Navbar';
 import HeroSection from '@/components/HeroSection';
 import LogoCloud from '@/components/LogoCloud';
@@ -12,11 +13,14 @@ import CTASection from '@/components/CTASection';
 import Footer from '@/components/Footer';
 import FloatingChatbot from '@/components/FloatingChatbot';
 
-// Force dynamic rendering since we are fetching from local API
-export const dynamic = 'force-dynamic';
+// Re-rendered at most every 30s from the published content bundle instead of on every request
+export const revalidate = 30;
+
+// generateMetadata and Home share one fetch per render
+const loadContent = cache(getPublishedContent);
 
 export async function generateMetadata() {
-  const content = await getAllContent();
+  const content = await loadContent();
   const seoData = content.find((c: any) => c.key === 'seo')?.content;
 
   return {
@@ -26,7 +30,7 @@ export async function generateMetadata() {
 }
 
 export default async function Home() {
-  const contentList = await getAllContent();
+  const contentList = await loadContent();
 
   // Helper to find section content
   const getContent = (key: string) => contentList.find((c: any) => c.key === key)?.content;
@@ -2,7 +2,7 @@
 
 import { useState, useRef, useEffect } from 'react';
 import { MessageCircle, X, Send, Sparkles, Bot, User, ChevronRight } from 'lucide-react';
-import { sendChatMessage } from '@/lib/api';
+import { streamChatMessage } from '@/lib/api';
 import ReactMarkdown from 'react-markdown';
 
 const SUGGESTED_QUESTIONS = [
@@ -38,18 +38,25 @@ export default function FloatingChatbot() {
         setInput('');
         setIsTyping(true);
 
+        let started = false;
         try {
-            // Simulate network delay for realism if it responds too fast
-            const minDelay = new Promise(resolve => setTimeout(resolve, 800));
-
-            const [res] = await Promise.all([
-                sendChatMessage(sessionId, text),
-                minDelay
-            ]);
-
-            setMessages(prev => [...prev, { role: 'bot', text: res.response }]);
+            // Show the reply as it streams in; the typing indicator covers the wait for the first chunk
+            await streamChatMessage(sessionId, text, (delta) => {
+                if (!started) {
+                    started = true;
+                    setIsTyping(false);
+                    setMessages(prev => [...prev, { role: 'bot', text: delta }]);
+                    return;
+                }
+                setMessages(prev => {
+                    const last = prev[prev.length - 1];
+                    return [...prev.slice(0, -1), { ...last, text: last.text + delta }];
+                });
+            });
         } catch (err) {
-            setMessages(prev => [...prev, { role: 'bot', text: 'I seem to be having trouble connecting. Please try again later.' }]);
+            if (!started) {
+                setMessages(prev => [...prev, { role: 'bot', text: 'I seem to be having trouble connecting. Please try again later.' }]);
+            }
         } finally {
             setIsTyping(false);
         }
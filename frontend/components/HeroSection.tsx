@@ -5,6 +5,7 @@ import Link from 'next/link';
 import { ArrowRight, TrendingUp, Users, DollarSign, ChevronLeft, ChevronRight } from 'lucide-react';
 import Scene3D from '@/components/3d/Scene3D';
 import { motion, AnimatePresence, Variants } from 'framer-motion';
+import { imageVariant, responsiveSrcSet } from '@/lib/api';
 
 interface HeroSlide {
     title: string;
@@ -165,7 +166,9 @@ export default function HeroSection({ content }: HeroProps) {
                                         {slide.image_url ? (
                                             <div className="relative z-10 rounded-3xl shadow-[0_20px_60px_-15px_rgba(0,0,0,0.5)] overflow-hidden border border-white/10 bg-brand-surface/50 backdrop-blur-xl">
                                                 <img
-                                                    src={slide.image_url}
+                                                    src={imageVariant(slide.image_url, 1280)}
+                                                    srcSet={responsiveSrcSet(slide.image_url)}
+                                                    sizes="(min-width: 1024px) 50vw, 100vw"
                                                     alt={slide.title}
                                                     className="w-full h-auto object-cover max-h-[600px]"
                                                 />
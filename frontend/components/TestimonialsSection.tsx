@@ -1,3 +1,5 @@
+import { imageVariant } from '@/lib/api';
+
 interface TestimonialItem {
     name: string;
     role: string;
@@ -32,7 +34,7 @@ export default function TestimonialsSection({ content }: TestimonialsProps) {
 
                             <div className="flex items-center gap-4">
                                 <img
-                                    src={item.avatar}
+                                    src={imageVariant(item.avatar, 96)}
                                     alt={item.name}
                                     className="w-12 h-12 rounded-full border-2 border-brand-primary shadow-sm"
                                 />
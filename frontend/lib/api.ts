@@ -38,6 +38,25 @@ export const getAllContent = async () => {
     }
 }
 
+// Published static bundle (see backend/publish_content_bundle.py): the manifest is tiny and
+// short-lived, the bundle it names is content-hashed and immutable. Falls back to the live API.
+export const getPublishedContent = async () => {
+    try {
+        const manifest = await fetch(`${API_BASE_URL}/public/content-manifest`, {
+            next: { revalidate: 30 },
+            signal: AbortSignal.timeout(2500),
+        });
+        if (manifest.ok) {
+            const { url } = await manifest.json();
+            const bundle = await fetch(url, { cache: 'force-cache', signal: AbortSignal.timeout(2500) });
+            if (bundle.ok) return await bundle.json();
+        }
+    } catch (error) {
+        console.warn("Content bundle unavailable (using live API):", error);
+    }
+    return getAllContent();
+};
+
 export const updateContent = async (key: string, content: any) => {
     try {
         const response = await axios.put(`${API_BASE_URL}/admin/content/${key}`, { content }, {
@@ -50,6 +69,56 @@ export const updateContent = async (key: string, content: any) => {
     }
 };
 
+export type JsonPatchOp =
+    | { op: 'add' | 'replace' | 'test'; path: string; value: any }
+    | { op: 'remove'; path: string };
+
+const escapePointer = (token: string) => token.replace(/~/g, '~0').replace(/\//g, '~1');
+
+// RFC 6902 operations turning `before` into `after`; unchanged subtrees produce nothing
+export const diffContent = (before: any, after: any, path = ''): JsonPatchOp[] => {
+    if (before === after) return [];
+    const bothArrays = Array.isArray(before) && Array.isArray(after);
+    const bothObjects = before && after && typeof before === 'object' && typeof after === 'object'
+        && !Array.isArray(before) && !Array.isArray(after);
+
+    if (bothArrays) {
+        const ops: JsonPatchOp[] = [];
+        const common = Math.min(before.length, after.length);
+        for (let i = 0; i < common; i++) ops.push(...diffContent(before[i], after[i], `${path}/${i}`));
+        // Remove from the end so earlier indexes stay valid
+        for (let i = before.length - 1; i >= common; i--) ops.push({ op: 'remove', path: `${path}/${i}` });
+        for (let i = common; i < after.length; i++) ops.push({ op: 'add', path: `${path}/-`, value: after[i] });
+        return ops;
+    }
+    if (bothObjects) {
+        const ops: JsonPatchOp[] = [];
+        for (const key of Object.keys(before)) {
+            const childPath = `${path}/${escapePointer(key)}`;
+            if (!(key in after)) ops.push({ op: 'remove', path: childPath });
+            else ops.push(...diffContent(before[key], after[key], childPath));
+        }
+        for (const key of Object.keys(after)) {
+            if (!(key in before)) ops.push({ op: 'add', path: `${path}/${escapePointer(key)}`, value: after[key] });
+        }
+        return ops;
+    }
+    return [{ op: 'replace', path, value: after }];
+};
+
+// Sends only the changed fields; a 412 means someone else saved this section since `version`
+export const patchContent = async (key: string, ops: JsonPatchOp[], version?: number) => {
+    try {
+        const headers: Record<string, string> = { ...getAuthHeaders(), 'Content-Type': 'application/json-patch+json' };
+        if (version !== undefined) headers['If-Match'] = `"${version}"`;
+        const response = await axios.patch(`${API_BASE_URL}/admin/content/${key}`, ops, { headers });
+        return response.data;
+    } catch (error) {
+        console.error(`Error patching content for ${key}:`, error);
+        throw error;
+    }
+};
+
 export const sendChatMessage = async (sessionId: string, message: string) => {
     try {
         const response = await axios.post(`${API_BASE_URL}/chat/message`, {
@@ -63,6 +132,58 @@ export const sendChatMessage = async (sessionId: string, message: string) => {
     }
 };
 
+// Stream a chat reply over Server-Sent Events; onDelta receives each text chunk as it arrives
+export const streamChatMessage = async (sessionId: string, message: string, onDelta: (chunk: string) => void) => {
+    const response = await fetch(`${API_BASE_URL}/chat/message/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+        body: JSON.stringify({ session_id: sessionId, message }),
+    });
+    if (!response.ok || !response.body) {
+        throw new Error(`Chat stream failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            if (rawEvent.startsWith('event: done')) continue;
+            const data = rawEvent.split('\n').find(line => line.startsWith('data: '));
+            if (!data) continue;
+            const { delta } = JSON.parse(data.slice(6));
+            if (delta) {
+                text += delta;
+                onDelta(delta);
+            }
+        }
+    }
+    return { response: text };
+};
+
+// Uploads stored by the API (/static/uploads/<sha256>.<ext>) can be served resized via /static/img
+const UPLOAD_URL_RE = /^(.*)\/static\/uploads\/([0-9a-f]{64}\.[a-z]+)$/;
+const VARIANT_WIDTHS = [320, 640, 960, 1280, 1920];
+
+export const imageVariant = (url: string, width: number) => {
+    const match = url?.match(UPLOAD_URL_RE);
+    return match ? `${match[1]}/static/img/${match[2]}?w=${width}` : url;
+};
+
+export const responsiveSrcSet = (url: string) => {
+    if (!url?.match(UPLOAD_URL_RE)) return undefined;
+    return VARIANT_WIDTHS.map(w => `${imageVariant(url, w)} ${w}w`).join(', ');
+};
+
 // Upload file
 export const uploadImage = async (file: File) => {
     const formData = new FormData();